@@ -10,26 +10,30 @@ GENERATED_SCRIPT_PATH = PROJECT_ROOT / "generated" / "result_script.py"
 sys.path.insert(0, str(PROJECT_ROOT / "app"))
 
 from app.process import main as generate_from_llm  # This runs generation
+from src.artifact_cache import artifact_for_script
 
 def generate_script_and_preview(description):
     """
     Generates the FreeCAD script using process.py logic and returns:
     - The script text for preview
     - The file path for download
+    - The cached STEP model, if this exact model code was already run in FreeCAD
+      (the download button is hidden otherwise)
     """
     import builtins
     original_input = builtins.input
     builtins.input = lambda _: description
     try:
-        generate_from_llm()
+        model_code = generate_from_llm()
     finally:
         builtins.input = original_input
 
     if GENERATED_SCRIPT_PATH.exists():
         script_text = GENERATED_SCRIPT_PATH.read_text(encoding="utf-8")
-        return script_text, str(GENERATED_SCRIPT_PATH)
+        step_file = artifact_for_script(model_code, "step")
+        return script_text, str(GENERATED_SCRIPT_PATH), gr.update(value=step_file, visible=step_file is not None)
     else:
-        return "Error: Script was not generated.", None
+        return "Error: Script was not generated.", None, gr.update(value=None, visible=False)
 
 
 css = """
@@ -113,6 +117,11 @@ with gr.Blocks(css=css) as demo:
                 label="Download Python Script",
                 elem_classes="download-button"
             )
+            download_model_btn = gr.DownloadButton(
+                label="Download STEP Model",
+                elem_classes="download-button",
+                visible=False
+            )
         with gr.Column(scale=1):
             gr.Markdown( #ToDo 
                 """
@@ -143,8 +152,11 @@ with gr.Blocks(css=css) as demo:
     generate_btn.click(
         fn=generate_script_and_preview,
         inputs=description_input,
-        outputs=[preview_output, download_btn]
+        outputs=[preview_output, download_btn, download_model_btn]
     )
 
 if __name__ == "__main__":
+    # Pick up newly published indexes without restarting the app
+    from src.llm_client import watch_index
+    watch_index()
     demo.launch()
\ No newline at end of file
@@ -40,8 +40,12 @@ def main():
             generated_code = generated_code[len("python"):].lstrip()
 
     # Step 5: Append GUI snippet for viewing
+    model_code = generated_code
     generated_code += "\n\n" + GUI_SNIPPET
 
     # Step 6: Save to script file
     GEN_SCRIPT.write_text(generated_code, encoding="utf-8")
-    print(f"\n Code generated and written to {GEN_SCRIPT}")
\ No newline at end of file
+    print(f"\n Code generated and written to {GEN_SCRIPT}")
+
+    # The code without the GUI snippet is what FreeCAD results are cached under
+    return model_code
\ No newline at end of file
@@ -2,12 +2,15 @@
 from src.llm_client import prompt_llm
 from pathlib import Path
 import subprocess
-from src.run_freecad import open_freecad
+import time
+from src.run_freecad import open_freecad, brep_path, step_path
+from src import artifact_cache
 
 GEN_SCRIPT = Path("generated/result_script.py")
 RUN_SCRIPT = Path("src/run_freecad.py")
 LOG_FILE = Path("generated/last_run_log.txt")
 BASE_INSTRUCTION = Path("prompts/base_instruction.txt")
+SCREENSHOT_FILE = Path("generated/screenshot.png")
 
 GUI_SNIPPET = """
 import FreeCADGui
@@ -25,21 +28,63 @@ print("📸 Screenshot saved at generated/screenshot.png")
 """
 
 MAX_RETRIES = 3  # Maximum auto-fix attempts
-
-def run_freecad_script():
-    """Run FreeCAD script via run_freecad.py and return success flag."""
+PREVIEW_TIMEOUT = 60  # Seconds to wait for the GUI run to save its screenshot
+
+def run_freecad_script(model_code):
+    """
+    Run FreeCAD script via run_freecad.py and return success flag.
+    model_code is the generated code without the GUI snippets; results are cached under it.
+    """
+    # Identical scripts are answered from the artifact cache without starting FreeCAD
+    cache_enabled = artifact_cache.enabled()
+    script_key = artifact_cache.script_key(model_code) if cache_enabled else None
+    cached = artifact_cache.lookup(script_key) if cache_enabled else None
+    if cached is not None:
+        print("⚡ Script already executed before. Using cached FreeCAD result.")
+        LOG_FILE.write_text(cached["log"])
+        return check_log(cached["log"].strip())
+
+    # Never read a log left behind by an earlier run
+    LOG_FILE.unlink(missing_ok=True)
+    started = time.time()
     process = subprocess.run(
         ["python", str(RUN_SCRIPT)],
         capture_output=True,
         text=True
     )
 
-    # Read the log file after running
-    if LOG_FILE.exists():
-        log_content = LOG_FILE.read_text().strip()
-    else:
-        log_content = ""
+    # The runner only writes the log once freecadcmd has actually run
+    if process.returncode != 0 or not LOG_FILE.exists():
+        raise RuntimeError(f"FreeCAD runner failed (exit code {process.returncode}):\n{process.stderr}")
+
+    log_content = LOG_FILE.read_text().strip()
+    success = check_log(log_content)
+    if cache_enabled:
+        artifact_cache.store(
+            script_key,
+            success,
+            log_content,
+            artifacts={"brep": brep_path, "step": step_path},
+            since=started
+        )
+    return success
+
+def cache_preview(model_code, since):
+    """Wait for the GUI run to save its screenshot and add it to the script's cache entry."""
+    deadline = time.time() + PREVIEW_TIMEOUT
+    while time.time() < deadline:
+        if SCREENSHOT_FILE.exists() and SCREENSHOT_FILE.stat().st_mtime >= since:
+            # Let the GUI finish writing the file
+            time.sleep(1)
+            artifact_cache.add_artifact(artifact_cache.script_key(model_code), "preview", SCREENSHOT_FILE)
+            print("📸 Preview image cached.")
+            return True
+        time.sleep(1)
+    print("⚠️ No screenshot from the FreeCAD GUI. Preview not cached.")
+    return False
 
+def check_log(log_content):
+    """Decide from the FreeCAD log whether the script ran successfully."""
     harmless_messages = {
         "Exception while processing file: generated/result_script.py [module 'FreeCADGui' has no attribute 'activeDocument']",
         "Exception while processing file: generated/result_script.py [module 'FreeCADGui' has no attribute 'ActiveDocument']"
@@ -74,7 +119,8 @@ def main():
         if generated_code.lower().startswith("python"):
             generated_code = generated_code[len("python"):].lstrip()
 
-    # Append GUI snippet
+    # Append GUI snippet; the model code alone identifies the script in the artifact cache
+    model_code = generated_code
     generated_code += "\n\n" + GUI_SNIPPET + screenshot_code
 
     # Save initial script
@@ -83,10 +129,13 @@ def main():
 
     for attempt in range(1, MAX_RETRIES + 1):
         print(f"\n▶ Attempt {attempt} running FreeCAD...")
-        success = run_freecad_script()
+        success = run_freecad_script(model_code)
 
         if success:
+            opened = time.time()
             open_freecad()
+            if artifact_cache.enabled():
+                cache_preview(model_code, opened)
             break
 
         # Read captured FreeCAD logs
@@ -117,7 +166,8 @@ Please provide a corrected FreeCAD script. Keep the logic same, just correct the
                 fixed_code = fixed_code[len("python"):].lstrip()
 
         # Save fixed code for next attempt
-        generated_code = fixed_code + "\n\n" + GUI_SNIPPET
+        model_code = fixed_code
+        generated_code = fixed_code + "\n\n" + GUI_SNIPPET + screenshot_code
         GEN_SCRIPT.write_text(generated_code)
         print(f"     Fixed code written to {GEN_SCRIPT}. Retrying...")
 
@@ -0,0 +1,161 @@
+# Content-addressed cache of FreeCAD execution results.
+#
+# Entries are keyed by the hash of the normalized script and the FreeCAD
+# version, and hold the execution outcome, the captured log and the exported
+# geometry (BREP/STEP). The preview image is written later by the GUI run
+# and added to the entry with add_artifact. Scripts are keyed without the GUI
+# and screenshot snippets appended for the interactive run, so the CLI and
+# the app agree.
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from src.run_freecad import freecadcmd_exe
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT_DIR / "generated" / "artifact_cache"
+
+META_FILE = "meta.json"
+LOG_FILE = "log.txt"
+ARTIFACT_FILES = {
+    "brep": "model.brep",
+    "step": "model.step",
+    "preview": "preview.png",
+}
+UNKNOWN_VERSION = "unknown"
+
+
+@functools.lru_cache(maxsize=1)
+def freecad_version():
+    """Version string reported by freecadcmd, or UNKNOWN_VERSION if it cannot be run."""
+    try:
+        process = subprocess.run(
+            [freecadcmd_exe, "--version"],
+            capture_output=True,
+            text=True,
+            timeout=60
+        )
+    except (OSError, subprocess.SubprocessError):
+        return UNKNOWN_VERSION
+    output = (process.stdout or process.stderr).strip()
+    return output.splitlines()[0] if output else UNKNOWN_VERSION
+
+
+def enabled():
+    """Results are only cached for a known FreeCAD version; otherwise every key would collide."""
+    return freecad_version() != UNKNOWN_VERSION
+
+
+def normalize_script(code):
+    """Drop blank lines, comment-only lines and trailing whitespace so cosmetic edits hash the same."""
+    lines = []
+    for line in code.replace("\r\n", "\n").split("\n"):
+        line = line.rstrip()
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def script_key(code, version=None):
+    """Cache key of a script for the given (default: installed) FreeCAD version."""
+    version = version or freecad_version()
+    digest = hashlib.sha256()
+    digest.update(version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_script(code).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def lookup(key):
+    """
+    Return the cached entry for key, or None on a miss.
+    The entry is the stored metadata plus the "log" text and absolute
+    "artifacts" paths of the files that exist.
+    """
+    entry_dir = CACHE_DIR / key
+    meta_path = entry_dir / META_FILE
+    if not meta_path.exists():
+        return None
+    try:
+        entry = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    log_path = entry_dir / LOG_FILE
+    entry["log"] = log_path.read_text(encoding="utf-8") if log_path.exists() else ""
+    entry["artifacts"] = {
+        name: str(entry_dir / filename)
+        for name, filename in ARTIFACT_FILES.items()
+        if (entry_dir / filename).exists()
+    }
+    return entry
+
+
+def store(key, success, log, artifacts=None, since=None):
+    """
+    Store an execution result under key and return the new entry.
+    artifacts maps names from ARTIFACT_FILES to files to copy into the cache;
+    files that are missing, or older than the `since` timestamp, are skipped.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Build the entry next to its final location and rename it into place,
+    # so readers never see a half-written entry
+    staging_dir = Path(tempfile.mkdtemp(dir=CACHE_DIR, prefix=".tmp-"))
+    try:
+        for name, source in (artifacts or {}).items():
+            source = Path(source)
+            if not source.exists():
+                continue
+            if since is not None and source.stat().st_mtime < since:
+                continue
+            shutil.copy2(source, staging_dir / ARTIFACT_FILES[name])
+
+        (staging_dir / LOG_FILE).write_text(log, encoding="utf-8")
+        meta = {
+            "key": key,
+            "freecad_version": freecad_version(),
+            "success": bool(success),
+            "created": time.time(),
+        }
+        (staging_dir / META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+        entry_dir = CACHE_DIR / key
+        if entry_dir.exists():
+            shutil.rmtree(entry_dir)
+        os.replace(staging_dir, entry_dir)
+    finally:
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    return lookup(key)
+
+
+def add_artifact(key, name, source):
+    """
+    Copy an artifact produced after the entry was stored (the GUI preview)
+    into it. Returns the updated entry, or None if key has no entry.
+    """
+    entry_dir = CACHE_DIR / key
+    if not (entry_dir / META_FILE).exists():
+        return None
+    target = entry_dir / ARTIFACT_FILES[name]
+    staging_path = entry_dir / f".tmp-{target.name}"
+    shutil.copy2(source, staging_path)
+    os.replace(staging_path, target)
+    return lookup(key)
+
+
+def artifact_for_script(code, name):
+    """Path of a cached artifact ("brep", "step" or "preview") for a script, or None."""
+    if not enabled():
+        return None
+    entry = lookup(script_key(code))
+    if entry is None or not entry["success"]:
+        return None
+    return entry["artifacts"].get(name)
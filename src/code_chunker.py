@@ -0,0 +1,98 @@
+# Structure-aware chunking of Python / FCMacro example scripts.
+#
+# Scripts are split along AST boundaries: every top-level function and class
+# is its own chunk, and the remaining top-level statements are grouped into
+# feature blocks at blank lines. The script's imports are prepended to each
+# chunk so that a retrieved example is runnable on its own.
+#
+# chunk_file runs in worker processes, so this module must stay cheap to import.
+
+import ast
+import hashlib
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+MAX_CHUNK_CHARS = 1500  # Feature blocks are merged up to this size; larger definitions are split
+FALLBACK_CHUNK_SIZE = 1000
+FALLBACK_CHUNK_OVERLAP = 100
+
+_fallback_splitter = RecursiveCharacterTextSplitter.from_language(
+    Language.PYTHON,
+    chunk_size=FALLBACK_CHUNK_SIZE,
+    chunk_overlap=FALLBACK_CHUNK_OVERLAP
+)
+
+
+def _start_line(node, lines):
+    """First line of a node, including decorators and the comment lines directly above it."""
+    start = node.lineno
+    if getattr(node, "decorator_list", None):
+        start = min(decorator.lineno for decorator in node.decorator_list)
+    while start > 1 and lines[start - 2].lstrip().startswith("#"):
+        start -= 1
+    return start
+
+
+def _blocks(tree, lines):
+    """Yield (name, start line, end line) for definitions and blank-line separated feature blocks."""
+    block = None  # [start, end] of the feature block being built
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue
+        start, end = _start_line(node, lines), node.end_lineno
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if block:
+                yield ("module", *block)
+                block = None
+            yield (node.name, start, end)
+            continue
+
+        separated = block is not None and any(not line.strip() for line in lines[block[1]:start - 1])
+        if block is None:
+            block = [start, end]
+        elif separated and _size(lines, block[0], end) > MAX_CHUNK_CHARS:
+            yield ("module", *block)
+            block = [start, end]
+        else:
+            block[1] = end
+    if block:
+        yield ("module", *block)
+
+
+def _size(lines, start, end):
+    return sum(len(line) for line in lines[start - 1:end])
+
+
+def chunk_source(source):
+    """Split a script into (text, extra metadata) chunks along AST boundaries."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return [(text, {"symbol": "unparsed"}) for text in _fallback_splitter.split_text(source)]
+
+    lines = source.splitlines(keepends=True)
+    imports = "".join(
+        "".join(lines[node.lineno - 1:node.end_lineno])
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+    chunks = []
+    for name, start, end in _blocks(tree, lines):
+        body = "".join(lines[start - 1:end]).strip("\n")
+        pieces = [body] if len(body) <= MAX_CHUNK_CHARS else _fallback_splitter.split_text(body)
+        for piece in pieces:
+            text = f"{imports}\n{piece}" if imports else piece
+            chunks.append((text, {"symbol": name, "start_line": start, "end_line": end}))
+
+    # A script made only of imports is still worth keeping
+    if not chunks and source.strip():
+        chunks.append((source.strip("\n"), {"symbol": "module", "start_line": 1, "end_line": len(lines)}))
+    return chunks
+
+
+def chunk_file(path):
+    """Read and chunk one file. Returns (path, sha256 of the content, chunks)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    source = data.decode("utf-8", errors="replace")
+    return path, hashlib.sha256(data).hexdigest(), chunk_source(source)
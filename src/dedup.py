@@ -0,0 +1,163 @@
+# URL canonicalization and near-duplicate detection for the index build.
+#
+# Pages are compared with 64-bit SimHash fingerprints, chunks with MinHash
+# signatures and locality-sensitive hashing, so both checks stay close to
+# constant time per document however large the crawl gets.
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, quote, urlsplit, urlunsplit
+import numpy as np
+
+# Query parameters of pages that only show another view of a page we index anyway
+NOISE_QUERY_KEYS = {"action", "oldid", "diff", "curid", "printable", "redirect", "mobileaction", "useskin", "veaction"}
+
+# Characters MediaWiki leaves unencoded in page paths (e.g. the ":" of Category:Part)
+WIKI_TITLE_SAFE = "/:;@$!*(),~"
+
+SHINGLE_SIZE = 3  # Words per shingle
+
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 6  # Pages within this Hamming distance (of 64 bits) are near-duplicates
+SIMHASH_BLOCKS = SIMHASH_MAX_DISTANCE + 1  # Pigeonhole: a near-duplicate matches one block exactly
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16  # LSH bands of MINHASH_PERMUTATIONS // MINHASH_BANDS rows
+MINHASH_THRESHOLD = 0.85  # Estimated Jaccard similarity above which chunks are near-duplicates
+MERSENNE_PRIME = (1 << 61) - 1
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def is_noise_url(url):
+    """True for history, diff, old revision and similar views of a page."""
+    keys = {key.lower() for key, _ in parse_qsl(urlsplit(url).query)}
+    return bool(keys & NOISE_QUERY_KEYS)
+
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so that variants of the same page compare equal: drop the
+    fragment and query string, lowercase scheme and host, strip trailing
+    slashes and turn wiki index.php?title=Page links into /Page.
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    query = dict(parse_qsl(parts.query))
+    if path.endswith("/index.php") and "title" in query:
+        path = path[: -len("index.php")] + quote(query["title"].replace(" ", "_"), safe=WIKI_TITLE_SAFE)
+    path = path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
+
+
+def _shingles(text):
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text):
+    """64-bit SimHash fingerprint of the text's word shingles."""
+    hashes = np.array([_hash64(shingle) for shingle in _shingles(text)], dtype=np.uint64)
+    if hashes.size == 0:
+        return 0
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    weights = bits.astype(np.int64).sum(axis=0) * 2 - len(hashes)
+    return int(sum(1 << i for i in np.nonzero(weights > 0)[0]))
+
+
+class SimHashIndex:
+    """Near-duplicate filter for whole pages."""
+
+    def __init__(self, max_distance=SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.block_bits = SIMHASH_BITS // SIMHASH_BLOCKS
+        self.blocks = [{} for _ in range(SIMHASH_BLOCKS)]  # block value -> fingerprints
+
+    def _block_values(self, fingerprint):
+        mask = (1 << self.block_bits) - 1
+        return [(fingerprint >> (i * self.block_bits)) & mask for i in range(SIMHASH_BLOCKS)]
+
+    def add(self, text):
+        """Add the text and return True, or return False if it near-duplicates an added text."""
+        fingerprint = simhash(text)
+        values = self._block_values(fingerprint)
+        for block, value in zip(self.blocks, values):
+            for other in block.get(value, ()):
+                if bin(fingerprint ^ other).count("1") <= self.max_distance:
+                    return False
+        for block, value in zip(self.blocks, values):
+            block.setdefault(value, []).append(fingerprint)
+        return True
+
+
+class MinHashIndex:
+    """Near-duplicate filter for chunks, using MinHash signatures and LSH banding."""
+
+    def __init__(self, threshold=MINHASH_THRESHOLD, permutations=MINHASH_PERMUTATIONS, bands=MINHASH_BANDS, seed=1):
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        # a < 2**29 and 32-bit shingle hashes keep a * x + b below 2**64
+        self.a = rng.integers(1, 1 << 29, size=permutations, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=permutations, dtype=np.uint64)
+        self.buckets = [{} for _ in range(bands)]  # band values -> signatures
+        self.empty_seen = False
+
+    def signature(self, text):
+        shingles = _shingles(text)
+        if not shingles:
+            return None
+        x = np.array([_hash64(shingle) >> 32 for shingle in shingles], dtype=np.uint64)
+        hashed = (x[:, None] * self.a[None, :] + self.b[None, :]) % np.uint64(MERSENNE_PRIME)
+        return hashed.min(axis=0)
+
+    def add(self, text):
+        """Add the text and return True, or return False if it near-duplicates an added text."""
+        signature = self.signature(text)
+        if signature is None:
+            duplicate, self.empty_seen = self.empty_seen, True
+            return not duplicate
+
+        keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+        for bucket, key in zip(self.buckets, keys):
+            for other in bucket.get(key, ()):
+                if np.mean(signature == other) >= self.threshold:
+                    return False
+        for bucket, key in zip(self.buckets, keys):
+            bucket.setdefault(key, []).append(signature)
+        return True
+
+
+class DedupStats:
+    """Counts of what URL canonicalization and near-duplicate detection dropped."""
+
+    def __init__(self):
+        self.urls_skipped = 0
+        self.pages_kept = 0
+        self.pages_dropped = 0
+        self.chunks_kept = 0
+        self.chunks_dropped = 0
+
+    def summary(self):
+        return (
+            f"Dedup report: {self.urls_skipped} duplicate/noise URLs skipped, "
+            f"{self.pages_dropped} of {self.pages_kept + self.pages_dropped} pages dropped, "
+            f"{self.chunks_dropped} of {self.chunks_kept + self.chunks_dropped} chunks dropped"
+        )
+
+
+def drop_duplicate_chunks(docs, stats=None):
+    """Keep the first of every group of near-duplicate chunks."""
+    index = MinHashIndex()
+    kept = [doc for doc in docs if index.add(doc.page_content)]
+    if stats is not None:
+        stats.chunks_kept += len(kept)
+        stats.chunks_dropped += len(docs) - len(kept)
+    return kept
@@ -0,0 +1,131 @@
+# Embedding backend shared by the index build (rag_builder, rag_extender) and
+# query (llm_client) paths.
+#
+# Backends (EMBEDDING_BACKEND in .env):
+#   torch      - full-precision PyTorch sentence-transformers model (default)
+#   onnx       - ONNX Runtime export of the same model
+#   onnx-int8  - int8-quantized ONNX model shipped in the model repository
+# Quantized backends should be checked against torch with
+#     python -m src.embeddings <index dir>
+# before serving an index built with the float model.
+
+import functools
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+from src.load_environment import load_env
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"  # int8 export in the all-MiniLM-L6-v2 repository
+
+# Tolerances of the quantized-vs-float check
+MIN_QUERY_COSINE = 0.98  # Mean cosine similarity of the query embeddings
+MIN_RESULT_OVERLAP = 0.8  # Mean overlap of the retrieved chunk sets
+
+
+def _onnx_session_options(threads):
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "The onnx embedding backends need onnxruntime and optimum: "
+            "pip install 'sentence-transformers[onnx]'"
+        ) from e
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    return options
+
+
+def get_embeddings(backend=None, batch_size=None, threads=None):
+    """
+    Return the shared embeddings for a backend, defaulting to the .env settings.
+    threads=0 keeps the library default thread count.
+    """
+    backend = backend or load_env.EMBEDDING_BACKEND
+    batch_size = batch_size or load_env.EMBEDDING_BATCH_SIZE
+    threads = load_env.EMBEDDING_THREADS if threads is None else threads
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
+    return _load_embeddings(backend, batch_size, threads)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_embeddings(backend, batch_size, threads):
+    model_kwargs = {"device": "cpu"}
+    if backend == "torch":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+    else:
+        onnx_kwargs = {
+            "provider": "CPUExecutionProvider",
+            "session_options": _onnx_session_options(threads),
+        }
+        if backend == "onnx-int8":
+            onnx_kwargs["file_name"] = ONNX_INT8_FILE
+        model_kwargs["backend"] = "onnx"
+        model_kwargs["model_kwargs"] = onnx_kwargs
+
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"batch_size": batch_size}
+    )
+
+
+def compare_backends(retriever_factory, queries, reference, candidate):
+    """
+    Compare a candidate backend with the reference (float) backend on a fixed
+    query set. retriever_factory(embeddings) must return a retriever over the
+    same (float) index that embeds its queries with the given embeddings.
+    Returns the mean query cosine similarity, the mean overlap of the retrieved
+    chunk sets and whether both are within tolerance.
+    """
+    reference_vectors = np.array(reference.embed_documents(queries))
+    candidate_vectors = np.array(candidate.embed_documents(queries))
+    cosine = np.sum(reference_vectors * candidate_vectors, axis=1) / (
+        np.linalg.norm(reference_vectors, axis=1) * np.linalg.norm(candidate_vectors, axis=1)
+    )
+
+    reference_results = retriever_factory(reference).batch(queries)
+    candidate_results = retriever_factory(candidate).batch(queries)
+    overlaps = []
+    for expected, actual in zip(reference_results, candidate_results):
+        expected_chunks = {doc.page_content for doc in expected}
+        actual_chunks = {doc.page_content for doc in actual}
+        overlaps.append(len(expected_chunks & actual_chunks) / max(len(expected_chunks), 1))
+
+    result = {
+        "query_cosine": float(cosine.mean()),
+        "result_overlap": float(np.mean(overlaps)),
+    }
+    result["within_tolerance"] = (
+        result["query_cosine"] >= MIN_QUERY_COSINE and result["result_overlap"] >= MIN_RESULT_OVERLAP
+    )
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.rag_partitions import PartitionedRetriever, load_partitioned
+    from src.retrieval_benchmark import LABELED_QUERIES
+
+    parser = argparse.ArgumentParser(description="Check a quantized embedding backend against the float model.")
+    parser.add_argument("index_dir", help="Local partitioned index built with the torch backend")
+    parser.add_argument("--backend", default="onnx-int8", choices=BACKENDS)
+    args = parser.parse_args()
+
+    reference = get_embeddings("torch")
+    candidate = get_embeddings(args.backend)
+    vectorstores = load_partitioned(args.index_dir, reference)
+
+    result = compare_backends(
+        lambda embeddings: PartitionedRetriever(vectorstores, embeddings, hybrid=False),
+        [item["query"] for item in LABELED_QUERIES],
+        reference,
+        candidate
+    )
+    print(f"Query cosine similarity: {result['query_cosine']:.4f} (min {MIN_QUERY_COSINE})")
+    print(f"Retrieved chunk overlap: {result['result_overlap']:.2%} (min {MIN_RESULT_OVERLAP:.0%})")
+    print("✅ Within tolerance." if result["within_tolerance"] else "❌ Outside tolerance.")
@@ -0,0 +1,161 @@
+# Local image similarity scoring used to gate the VLM comparison.
+#
+# All scores are computed on small grayscale copies of the images and are
+# vectorized over batches, so many candidate renders can be scored against
+# many reference images in a single call.
+
+from pathlib import Path
+import numpy as np
+from PIL import Image
+
+IMAGE_SIZE = 128  # Images are resized to IMAGE_SIZE x IMAGE_SIZE before scoring
+HASH_SIZE = 8  # pHash uses the top-left HASH_SIZE x HASH_SIZE DCT coefficients
+DCT_SIZE = 32  # Images are reduced to DCT_SIZE x DCT_SIZE before the DCT
+SSIM_WINDOW = 7  # Side length of the uniform SSIM window
+FOREGROUND_TOLERANCE = 0.1  # Min difference from the background to count as part
+
+SIMILARITY_THRESHOLD = 0.85  # Combined score above which the VLM is skipped
+SCORE_WEIGHTS = {
+    "iou": 0.4,
+    "phash": 0.2,
+    "ssim": 0.4,
+}
+
+
+def load_image(image, size=IMAGE_SIZE):
+    """Load a path, PIL image or array as a (size, size) float32 grayscale array in [0, 1]."""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    elif isinstance(image, (str, Path)):
+        image = Image.open(image)
+    image = image.convert("L").resize((size, size), Image.BILINEAR)
+    return np.asarray(image, dtype=np.float32) / 255.0
+
+
+def load_batch(images, size=IMAGE_SIZE):
+    """Load several images into a single (N, size, size) array."""
+    return np.stack([load_image(image, size) for image in images])
+
+
+def silhouette_masks(batch):
+    """Foreground masks, taking the median border pixel of each image as the background."""
+    border = np.concatenate(
+        [batch[:, 0, :], batch[:, -1, :], batch[:, :, 0], batch[:, :, -1]], axis=1
+    )
+    background = np.median(border, axis=1)[:, None, None]
+    return np.abs(batch - background) > FOREGROUND_TOLERANCE
+
+
+def silhouette_iou(candidates, references):
+    """Pairwise (N, M) intersection-over-union of the part silhouettes."""
+    a = silhouette_masks(candidates).reshape(len(candidates), -1).astype(np.float32)
+    b = silhouette_masks(references).reshape(len(references), -1).astype(np.float32)
+    intersection = a @ b.T
+    union = a.sum(axis=1)[:, None] + b.sum(axis=1)[None, :] - intersection
+    # Two empty silhouettes are identical
+    return np.where(union > 0, intersection / np.maximum(union, 1.0), 1.0)
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+def perceptual_hash(batch):
+    """(N, HASH_SIZE**2) boolean DCT perceptual hashes."""
+    n, size, _ = batch.shape
+    factor = size // DCT_SIZE
+    reduced = batch[:, : DCT_SIZE * factor, : DCT_SIZE * factor]
+    reduced = reduced.reshape(n, DCT_SIZE, factor, DCT_SIZE, factor).mean(axis=(2, 4))
+    dct = _dct_matrix(DCT_SIZE)
+    coefficients = np.einsum("ij,njk,lk->nil", dct, reduced, dct)
+    low = coefficients[:, :HASH_SIZE, :HASH_SIZE].reshape(n, -1)
+    # Skip the DC term when computing the median
+    median = np.median(low[:, 1:], axis=1)[:, None]
+    return low > median
+
+
+def phash_similarity(candidates, references):
+    """Pairwise (N, M) similarity as 1 - normalized Hamming distance of the pHashes."""
+    a = perceptual_hash(candidates).astype(np.float32)
+    b = perceptual_hash(references).astype(np.float32)
+    hamming = a @ (1.0 - b).T + (1.0 - a) @ b.T
+    return 1.0 - hamming / a.shape[1]
+
+
+def edge_maps(batch):
+    """Sobel gradient magnitude of each image, normalized to [0, 1] per image."""
+    padded = np.pad(batch, ((0, 0), (1, 1), (1, 1)), mode="edge")
+    gx = (
+        (padded[:, :-2, 2:] + 2 * padded[:, 1:-1, 2:] + padded[:, 2:, 2:])
+        - (padded[:, :-2, :-2] + 2 * padded[:, 1:-1, :-2] + padded[:, 2:, :-2])
+    )
+    gy = (
+        (padded[:, 2:, :-2] + 2 * padded[:, 2:, 1:-1] + padded[:, 2:, 2:])
+        - (padded[:, :-2, :-2] + 2 * padded[:, :-2, 1:-1] + padded[:, :-2, 2:])
+    )
+    magnitude = np.hypot(gx, gy)
+    peak = magnitude.reshape(len(batch), -1).max(axis=1)[:, None, None]
+    return magnitude / np.maximum(peak, 1e-6)
+
+
+def _box_filter(batch, window=SSIM_WINDOW):
+    """Mean over every valid window x window patch, using integral images."""
+    integral = np.pad(batch, [(0, 0)] * (batch.ndim - 2) + [(1, 0), (1, 0)])
+    integral = integral.cumsum(axis=-2).cumsum(axis=-1)
+    total = (
+        integral[..., window:, window:]
+        - integral[..., :-window, window:]
+        - integral[..., window:, :-window]
+        + integral[..., :-window, :-window]
+    )
+    return total / (window * window)
+
+
+def edge_ssim(candidates, references, c1=0.01 ** 2, c2=0.03 ** 2):
+    """Pairwise (N, M) mean SSIM between the normalized edge maps."""
+    x = edge_maps(candidates)
+    y = edge_maps(references)
+
+    mu_x = _box_filter(x)[:, None]
+    mu_y = _box_filter(y)[None, :]
+    var_x = _box_filter(x * x)[:, None] - mu_x ** 2
+    var_y = _box_filter(y * y)[None, :] - mu_y ** 2
+    cov = _box_filter(x[:, None] * y[None, :]) - mu_x * mu_y
+
+    ssim = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / (
+        (mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2)
+    )
+    return ssim.mean(axis=(-2, -1))
+
+
+def score_batch(candidates, references, weights=SCORE_WEIGHTS):
+    """
+    Score every candidate render against every reference image.
+    Returns a dict of (N, M) arrays with the individual metrics and their
+    weighted "combined" score.
+    """
+    candidates = load_batch(candidates)
+    references = load_batch(references)
+    scores = {
+        "iou": silhouette_iou(candidates, references),
+        "phash": phash_similarity(candidates, references),
+        "ssim": edge_ssim(candidates, references),
+    }
+    total_weight = sum(weights.values())
+    scores["combined"] = sum(weights[name] * scores[name] for name in weights) / total_weight
+    return scores
+
+
+def similarity_score(cad_image, reference_image):
+    """Combined similarity score of a single pair of images."""
+    return float(score_batch([cad_image], [reference_image])["combined"][0, 0])
+
+
+def needs_vlm(cad_image, reference_images, threshold=SIMILARITY_THRESHOLD):
+    """Return True unless the render already matches one of the references closely enough."""
+    best = score_batch([cad_image], reference_images)["combined"].max()
+    return bool(best < threshold)
@@ -1,39 +1,171 @@
+import base64
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from PIL import Image
 from langchain_google_genai import ChatGoogleGenerativeAI
-from src.load_environment import load_env
 from langchain.schema import HumanMessage
-from pathlib import Path
+from src.load_environment import load_env
+from src.image_compare.similarity import score_batch, SIMILARITY_THRESHOLD
 
 GEMINI_API_KEY = load_env.GEMINI_API_KEY_IMAGE
-image_path_cad = Path("generated/screenshot.png") # Update image paths
-image_path_downloaded = r"C:\Users\yasin\Desktop\flange_downloaded.jpeg" # Update image paths
+VLM_MODEL = "gemma-3-12b-it"
 
-llm = ChatGoogleGenerativeAI(
-    model="gemma-3-12b-it",
-    api_key=GEMINI_API_KEY
+MAX_IMAGE_SIZE = 768  # Longest side of the images sent to the VLM
+JPEG_QUALITY = 90
+MAX_CONCURRENCY = 4  # Parallel VLM requests in compare_batch
+MAX_CACHE_ENTRIES = 256  # Per cache (encoded images and VLM responses)
+
+PROMPT_TEMPLATE = (
+    "You are an expert CAD engineer working with FreeCAD 1.0.1. You are given two images:"
+    "The first image is a CAD-generated geometry described as: {description}."
+    "The second image is a real part that the CAD geometry needs to replicate."
+    "Your task: Compare the CAD geometry (image 1) with the real part (image 2) and identify **all major design changes required to make the CAD model match the real part."
+
+    "Requirements:"
+    "Think like a CAD engineer modifying a FreeCAD model."
+    "Focus only on features of the image, geometry, structural features, structure, overall structure."
+    "Ignore color, texture, or surface finish. Dont write about differences in general apperance, color, texture, or surface finish"
+    "Output **clear, step-by-step, pointwise instructions** describing exactly what changes to make in the CAD geometry. give only instructions, dont give any prefix like let's analyze the images and outline the necessary CAD modifications in FreeCAD"
+    "Be precise with positions, and features whenever possible. make maximum of 7 lines"
 )
 
-messages = [
-       HumanMessage(
-        content=(
-            "You are an expert CAD engineer working with FreeCAD 1.0.1. You are given two images:"
-            "The first image is a CAD-generated geometry described as: user_input." # Use {user_input} linked to the actual user input for llm
-            "The second image is a real part that the CAD geometry needs to replicate."
-            "Your task: Compare the CAD geometry (image 1) with the real part (image 2) and identify **all major design changes required to make the CAD model match the real part."
-
-            "Requirements:"
-            "Think like a CAD engineer modifying a FreeCAD model."
-            "Focus only on features of the image, geometry, structural features, structure, overall structure."
-            "Ignore color, texture, or surface finish. Dont write about differences in general apperance, color, texture, or surface finish"
-            "Output **clear, step-by-step, pointwise instructions** describing exactly what changes to make in the CAD geometry. give only instructions, dont give any prefix like let's analyze the images and outline the necessary CAD modifications in FreeCAD"
-            "Be precise with positions, and features whenever possible. make maximum of 7 lines"
-            
-        ),
-        # additional_kwargs={"images": [image_path_cad]}  # Pass both images
-        additional_kwargs={"images": [image_path_cad, image_path_downloaded]}  # Pass both images
-
-        # additional_kwargs={"images": [cad_bytes, real_bytes]}
-    )
-]
-
-response = llm.invoke(messages)
-print(response.content)
\ No newline at end of file
+_llm = None
+_cache_lock = threading.Lock()
+_encoded_images = OrderedDict()  # image hash -> base64 data URL
+_responses = OrderedDict()  # (cad hash, reference hash, description) -> VLM response
+
+
+def get_llm():
+    """Create the VLM client on first use."""
+    global _llm
+    if _llm is None:
+        _llm = ChatGoogleGenerativeAI(model=VLM_MODEL, api_key=GEMINI_API_KEY)
+    return _llm
+
+
+def _cache_get(cache, key):
+    with _cache_lock:
+        if key not in cache:
+            return None
+        cache.move_to_end(key)
+        return cache[key]
+
+
+def _cache_put(cache, key, value):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > MAX_CACHE_ENTRIES:
+            cache.popitem(last=False)
+
+
+def image_hash(image):
+    """SHA-256 of the image content. Accepts a path, PIL image or array."""
+    digest = hashlib.sha256()
+    if isinstance(image, (str, Path)):
+        digest.update(Path(image).read_bytes())
+    elif isinstance(image, np.ndarray):
+        digest.update(str(image.shape).encode())
+        digest.update(np.ascontiguousarray(image).tobytes())
+    else:
+        digest.update(f"{image.mode}{image.size}".encode())
+        digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def encode_image(image, digest=None):
+    """Downsample the image and return it as a base64 JPEG data URL, cached by content hash."""
+    digest = digest or image_hash(image)
+    cached = _cache_get(_encoded_images, digest)
+    if cached is not None:
+        return cached
+
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    elif isinstance(image, (str, Path)):
+        image = Image.open(image)
+    image = image.convert("RGB")
+    image.thumbnail((MAX_IMAGE_SIZE, MAX_IMAGE_SIZE), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+    data_url = "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+    _cache_put(_encoded_images, digest, data_url)
+    return data_url
+
+
+def build_message(cad_image, reference_image, description, cad_hash=None, reference_hash=None):
+    """Build the comparison message with the CAD render first and the reference second."""
+    return HumanMessage(content=[
+        {"type": "text", "text": PROMPT_TEMPLATE.format(description=description)},
+        {"type": "image_url", "image_url": encode_image(cad_image, cad_hash)},
+        {"type": "image_url", "image_url": encode_image(reference_image, reference_hash)},
+    ])
+
+
+def compare_batch(cad_images, reference_image, description, threshold=SIMILARITY_THRESHOLD):
+    """
+    Compare several candidate renders against one reference image.
+    Returns one entry per candidate: the VLM's change instructions, or None when
+    the render is already similar enough to the reference to skip the VLM.
+    Identical comparisons are answered from the response cache.
+    """
+    cad_images = list(cad_images)
+    if threshold is not None:
+        scores = score_batch(cad_images, [reference_image])["combined"][:, 0]
+    else:
+        scores = np.zeros(len(cad_images))
+
+    reference_hash = image_hash(reference_image)
+    results = [None] * len(cad_images)
+    pending = {}  # cache key -> indices of candidates waiting on that comparison
+    messages = {}
+
+    for i, (cad_image, score) in enumerate(zip(cad_images, scores)):
+        if threshold is not None and score >= threshold:
+            continue
+        cad_hash = image_hash(cad_image)
+        key = (cad_hash, reference_hash, description)
+        cached = _cache_get(_responses, key)
+        if cached is not None:
+            results[i] = cached
+            continue
+        if key not in pending:
+            messages[key] = [build_message(cad_image, reference_image, description, cad_hash, reference_hash)]
+            pending[key] = []
+        pending[key].append(i)
+
+    if pending:
+        keys = list(pending)
+        responses = get_llm().batch(
+            [messages[key] for key in keys],
+            config={"max_concurrency": MAX_CONCURRENCY},
+        )
+        for key, response in zip(keys, responses):
+            _cache_put(_responses, key, response.content)
+            for i in pending[key]:
+                results[i] = response.content
+
+    return results
+
+
+def compare(cad_image, reference_image, description, threshold=SIMILARITY_THRESHOLD):
+    """
+    Compare a CAD render with a reference image.
+    Returns the VLM's change instructions, or None if the images already match.
+    """
+    return compare_batch([cad_image], reference_image, description, threshold)[0]
+
+
+if __name__ == "__main__":
+    image_path_cad = Path("generated/screenshot.png") # Update image paths
+    image_path_downloaded = r"C:\Users\yasin\Desktop\flange_downloaded.jpeg" # Update image paths
+    feedback = compare(image_path_cad, image_path_downloaded, "user_input")
+    if feedback is None:
+        print("✅ CAD render matches the reference image. Skipping VLM comparison.")
+    else:
+        print(feedback)
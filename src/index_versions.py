@@ -0,0 +1,144 @@
+# Versioned, atomically published vectorstore directories.
+#
+# Layout of an index root:
+#     <root>/versions/<version>/<partition>/...   partitioned FAISS + BM25 indexes
+#     <root>/versions/<version>/manifest.json     corpus hash, embedding model, build time, doc counts
+#     <root>/CURRENT                              name of the published version
+# A version is fully written before it is renamed into versions/ and CURRENT
+# is swapped with os.replace, so readers only ever see complete indexes.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from src.embeddings import EMBEDDING_MODEL
+from src.load_environment import load_env
+from src.rag_partitions import load_lexical_indexes, load_partitioned, save_partitioned
+
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+KEEP_VERSIONS = 3  # Published versions kept on disk, including the current one
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vectorstore")
+
+
+def index_root():
+    """Root the builder and the extender publish to: INDEX_DIR, else ./vectorstore."""
+    return load_env.INDEX_DIR or DEFAULT_ROOT
+
+
+def corpus_hash(vectorstores):
+    """Order-independent SHA-256 over the (partition, source, text) of every chunk."""
+    chunk_hashes = []
+    for name, vectorstore in vectorstores.items():
+        for docstore_id in vectorstore.index_to_docstore_id.values():
+            doc = vectorstore.docstore.search(docstore_id)
+            chunk = f"{name}\0{doc.metadata.get('source', '')}\0{doc.page_content}"
+            chunk_hashes.append(hashlib.sha256(chunk.encode("utf-8")).hexdigest())
+    digest = hashlib.sha256()
+    for chunk_hash in sorted(chunk_hashes):
+        digest.update(chunk_hash.encode("ascii"))
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def publish(vectorstores, root, extra=None):
+    """
+    Save the partitions as a new version under root, make it current and
+    return its manifest. `extra` adds builder-specific fields to the manifest.
+    """
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    os.makedirs(versions_dir, exist_ok=True)
+
+    corpus = corpus_hash(vectorstores)
+    built = time.time()
+    version = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime(built))}-{corpus[:8]}"
+    # Same corpus published within the same second, possibly with a different manifest
+    base_version, attempt = version, 1
+    while os.path.exists(os.path.join(versions_dir, version)):
+        attempt += 1
+        version = f"{base_version}-{attempt}"
+    manifest = {
+        "version": version,
+        "corpus_hash": corpus,
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_backend": load_env.EMBEDDING_BACKEND,
+        "build_time": built,
+        "doc_count": sum(store.index.ntotal for store in vectorstores.values()),
+        "partitions": {name: store.index.ntotal for name, store in vectorstores.items()},
+        **(extra or {}),
+    }
+
+    staging_dir = tempfile.mkdtemp(dir=versions_dir, prefix=".tmp-")
+    try:
+        save_partitioned(vectorstores, staging_dir)
+        with open(os.path.join(staging_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(staging_dir, os.path.join(versions_dir, version))
+    finally:
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    _write_atomic(os.path.join(root, CURRENT_FILE), version)
+    prune_versions(root)
+    return manifest
+
+
+def prune_versions(root, keep=KEEP_VERSIONS):
+    """
+    Delete all but the newest `keep` versions. Running services hold their
+    index in memory, so removing the directory of a version they use is safe.
+    """
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    current = current_version(root)
+    # Version names start with their UTC build time, so they sort chronologically
+    versions = sorted(name for name in os.listdir(versions_dir) if not name.startswith("."))
+    for version in versions[:-keep]:
+        if version != current:
+            shutil.rmtree(os.path.join(versions_dir, version), ignore_errors=True)
+
+
+def current_version(root):
+    """Name of the published version under root, or None."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def has_version(root, version):
+    return os.path.exists(os.path.join(root, VERSIONS_DIR, version, MANIFEST_FILE))
+
+
+def read_manifest(root, version):
+    with open(os.path.join(root, VERSIONS_DIR, version, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_version(root, embeddings, version=None):
+    """
+    Load a version (default: the current one).
+    Returns (vectorstores, lexical_indexes, manifest). Raises ValueError if the
+    index was embedded with a different model than the one used for queries.
+    """
+    version = version or current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No published index under {root}")
+    manifest = read_manifest(root, version)
+    if manifest["embedding_model"] != EMBEDDING_MODEL:
+        raise ValueError(
+            f"Index {version} was built with {manifest['embedding_model']}, "
+            f"but queries are embedded with {EMBEDDING_MODEL}"
+        )
+    version_dir = os.path.join(root, VERSIONS_DIR, version)
+    return load_partitioned(version_dir, embeddings), load_lexical_indexes(version_dir), manifest
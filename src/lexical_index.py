@@ -0,0 +1,124 @@
+# BM25 inverted index over document chunks with identifier-aware tokenization.
+#
+# Dense MiniLM embeddings are weak at exact FreeCAD API identifiers such as
+# makeCylinder, Part.makePolygon or Sketcher.Constraint; this index matches
+# them exactly and its ranking is fused with the dense one (reciprocal rank
+# fusion) at retrieval time.
+
+import json
+import math
+import os
+import re
+from collections import Counter
+
+LEXICAL_FILE = "lexical.json"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # Rank offset of reciprocal rank fusion
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*")
+CAMEL_CASE_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with",
+}
+
+
+def tokenize(text):
+    """
+    Split text into lowercase terms, keeping API identifiers intact.
+    "Part.makePolygon" yields "part.makepolygon", "part", "makepolygon",
+    "make" and "polygon", so both exact and partial lookups match.
+    """
+    tokens = []
+    for match in IDENTIFIER_PATTERN.finditer(text):
+        identifier = match.group()
+        parts = identifier.split(".")
+        if len(parts) > 1:
+            tokens.append(identifier.lower())
+        for part in parts:
+            lowered = part.lower()
+            if lowered not in STOPWORDS:
+                tokens.append(lowered)
+            pieces = CAMEL_CASE_PATTERN.findall(part)
+            if len(pieces) > 1:
+                tokens.extend(piece.lower() for piece in pieces if piece.lower() not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Inverted index scoring documents (identified by docstore id) with BM25."""
+
+    def __init__(self, doc_ids, postings, doc_lengths):
+        self.doc_ids = doc_ids
+        self.postings = postings  # term -> [[doc position, term frequency], ...]
+        self.doc_lengths = doc_lengths
+        self.avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+        n = len(doc_ids)
+        self.idf = {
+            term: math.log(1 + (n - len(entries) + 0.5) / (len(entries) + 0.5))
+            for term, entries in postings.items()
+        }
+
+    @classmethod
+    def from_texts(cls, doc_ids, texts):
+        postings = {}
+        doc_lengths = []
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                postings.setdefault(term, []).append([position, frequency])
+        return cls(list(doc_ids), postings, doc_lengths)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore):
+        """Index every chunk in a FAISS vectorstore's docstore."""
+        doc_ids = list(vectorstore.index_to_docstore_id.values())
+        texts = [vectorstore.docstore.search(doc_id).page_content for doc_id in doc_ids]
+        return cls.from_texts(doc_ids, texts)
+
+    def search(self, query, k):
+        """Return up to k (docstore id, score) pairs, best first."""
+        scores = {}
+        for term in set(tokenize(query)):
+            entries = self.postings.get(term)
+            if not entries:
+                continue
+            idf = self.idf[term]
+            for position, frequency in entries:
+                length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[position] / self.avg_length
+                scores[position] = scores.get(position, 0.0) + idf * frequency * (BM25_K1 + 1) / (
+                    frequency + BM25_K1 * length_norm
+                )
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.doc_ids[position], score) for position, score in best]
+
+    def save(self, path):
+        with open(os.path.join(path, LEXICAL_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "doc_ids": self.doc_ids,
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths,
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        """Load the index saved in path, or return None if there is none."""
+        file_path = os.path.join(path, LEXICAL_FILE)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["doc_ids"], data["postings"], data["doc_lengths"])
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuse several best-first lists of ids into one, scoring each id by sum(1 / (k + rank))."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -1,13 +1,19 @@
+import threading
+import time
 import uuid
 from pathlib import Path
-from huggingface_hub import hf_hub_download
-from langchain_huggingface import HuggingFaceEmbeddings
+from huggingface_hub import HfApi, hf_hub_download
+from huggingface_hub.utils import EntryNotFoundError
 from langchain_community.vectorstores import FAISS
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import START, MessagesState, StateGraph
 from src.load_environment import load_env
+from src.embeddings import get_embeddings
+from src.rag_partitions import PARTITIONS, PartitionedRetriever, load_partitioned, load_lexical_indexes, split_vectorstore
+from src.lexical_index import LEXICAL_FILE
+from src.index_versions import current_version, has_version, load_version
 
 GEMINI_API_KEY = load_env.GEMINI_API_KEY
 
@@ -15,18 +21,106 @@ REPO_ID = "Yas1n/CADomatic_vectorstore"
 FILENAME_FAISS = "index.faiss"
 FILENAME_PKL = "index.pkl"
 
-faiss_path = hf_hub_download(repo_id=REPO_ID, filename=FILENAME_FAISS)
-pkl_path = hf_hub_download(repo_id=REPO_ID, filename=FILENAME_PKL)
-download_dir = Path(faiss_path).parent
-
-embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-vectorstore = FAISS.load_local(
-    str(download_dir),
-    embeddings=embedding,
-    allow_dangerous_deserialization=True,
-    index_name="index"
-)
-retriever = vectorstore.as_retriever(search_kwargs={"k": 15})
+# Local versioned index root; the index is served from the Hub repo when it is
+# unset or nothing has been published there yet
+INDEX_DIR = load_env.INDEX_DIR
+RELOAD_INTERVAL = 60  # Seconds between checks for a newly published index
+
+embedding = get_embeddings()
+
+def load_vectorstores(revision=None):
+    """
+    Download the partitioned index and its BM25 indexes, or split the single
+    index if the repo has no partitions. Returns (vectorstores, lexical_indexes).
+    Partitions without a BM25 index get one built by the retriever.
+    """
+    snapshot_dir = None
+    for name in PARTITIONS:
+        try:
+            for filename in (FILENAME_FAISS, FILENAME_PKL):
+                path = hf_hub_download(repo_id=REPO_ID, filename=f"{name}/{filename}", revision=revision)
+        except EntryNotFoundError:
+            continue
+        snapshot_dir = Path(path).parent.parent
+        try:
+            hf_hub_download(repo_id=REPO_ID, filename=f"{name}/{LEXICAL_FILE}", revision=revision)
+        except EntryNotFoundError:
+            pass
+    if snapshot_dir is not None:
+        return load_partitioned(str(snapshot_dir), embedding), load_lexical_indexes(str(snapshot_dir))
+
+    faiss_path = hf_hub_download(repo_id=REPO_ID, filename=FILENAME_FAISS, revision=revision)
+    hf_hub_download(repo_id=REPO_ID, filename=FILENAME_PKL, revision=revision)
+    vectorstore = FAISS.load_local(
+        str(Path(faiss_path).parent),
+        embeddings=embedding,
+        allow_dangerous_deserialization=True,
+        index_name="index"
+    )
+    return split_vectorstore(vectorstore, embedding), {}
+
+def latest_index_version():
+    """
+    Published version under INDEX_DIR, else the latest commit of the Hub repo.
+    None if the Hub cannot be reached.
+    """
+    if INDEX_DIR:
+        version = current_version(INDEX_DIR)
+        if version:
+            return version
+    try:
+        return HfApi().repo_info(REPO_ID).sha
+    except Exception as e:
+        # Offline: fall back to the cached download of the default revision
+        print(f"Could not check {REPO_ID} for updates: {e}")
+        return None
+
+def load_retriever(version):
+    """Build a retriever over the given index version."""
+    if INDEX_DIR and version and has_version(INDEX_DIR, version):
+        vectorstores, lexical_indexes, _ = load_version(INDEX_DIR, embedding, version)
+    else:
+        vectorstores, lexical_indexes = load_vectorstores(revision=version)
+    # Searches only the partitions relevant to the query, with a k quota per partition,
+    # fusing dense and BM25 rankings within each partition
+    return PartitionedRetriever(vectorstores, embedding, lexical_indexes=lexical_indexes)
+
+if INDEX_DIR and not current_version(INDEX_DIR):
+    print(f"⚠ No index published under {INDEX_DIR} yet. Serving {REPO_ID} until one is.")
+index_version = latest_index_version()
+retriever = load_retriever(index_version)
+_reload_lock = threading.Lock()
+
+def reload_index(force=False):
+    """
+    Swap in the newest published index if it changed. The new retriever is
+    fully loaded before the global is rebound, and requests already running
+    keep the retriever they started with. Returns True if the index changed.
+    """
+    global retriever, index_version
+    with _reload_lock:
+        version = latest_index_version()
+        # None means the Hub could not be checked, not that the index changed
+        if (version is None or version == index_version) and not force:
+            return False
+        new_retriever = load_retriever(version)
+        retriever, index_version = new_retriever, version
+    print(f"🔄 Switched to index version {version}")
+    return True
+
+def watch_index(interval=RELOAD_INTERVAL):
+    """Check for a newly published index every `interval` seconds in a daemon thread."""
+    def watch():
+        while True:
+            time.sleep(interval)
+            try:
+                reload_index()
+            except Exception as e:
+                print(f"Index reload failed, keeping version {index_version}: {e}")
+
+    thread = threading.Thread(target=watch, name="index-watcher", daemon=True)
+    thread.start()
+    return thread
 
 workflow = StateGraph(state_schema=MessagesState)
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7, api_key=GEMINI_API_KEY)
@@ -11,6 +11,16 @@ class LoadEnv:
         self.GEMINI_API_KEY_IMAGE = os.getenv("GEMINI_API_KEY_IMAGE")
         self.HF_TOKEN = os.getenv("HF_TOKEN")
 
+        # Embedding backend shared by index building and retrieval (see src/embeddings.py)
+        self.EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+        self.EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+        self.EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+
+        # Versioned index root (see src/index_versions.py) that rag_builder and rag_extender
+        # publish to and the app serves from; when unset they publish to ./vectorstore
+        # and the app serves the Hub index
+        self.INDEX_DIR = os.getenv("INDEX_DIR")
+
     def _load_env_file(self):
         if os.path.exists(".env.local"):
             load_dotenv('.env.local')
@@ -3,8 +3,10 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from src.embeddings import get_embeddings
+from src.rag_partitions import build_partitioned, save_partitioned
+from src.index_versions import current_version, index_root, load_version, publish
+from src.dedup import DedupStats, SimHashIndex, canonicalize_url, drop_duplicate_chunks, is_noise_url
 
 BASE_URL_WIKI = "https://wiki.freecad.org/Power_users_hub"
 BASE_URL_GITHUB = "https://github.com/shaise/FreeCAD_FastenersWB"
@@ -22,6 +24,8 @@ LANG_IDENTIFIERS = [
 
 CHECKPOINT_INTERVAL = 500  # save every 500 pages
 
+CRAWLED_PARTITIONS = ("wiki", "fasteners")  # other partitions (macros) come from rag_extender
+
 VECTORSTORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../vectorstore")
 os.makedirs(VECTORSTORE_PATH, exist_ok=True)
 
@@ -36,12 +40,20 @@ def is_excluded_url(url):
         "edit&section" in url_lower
     )
 
-def crawl_wiki(start_url, max_pages):
-    visited = set()
-    to_visit = [start_url]
+def page_type(url):
+    return "github page" if "github.com" in url.lower() else "wiki page"
+
+def crawl_wiki(start_url, max_pages, stats=None):
+    stats = stats if stats is not None else DedupStats()
+    page_filter = SimHashIndex()  # drops pages whose text near-duplicates a kept page
+    visited = set()  # canonical URLs fetched, plus the canonical URLs they redirected to
+    fetched = 0  # pages fetched; redirect targets do not count against max_pages
+    queued = set()
+    skipped = set()  # distinct raw URLs that were noise or aliases of a known page
+    to_visit = [canonicalize_url(start_url)]
     pages = []
 
-    while to_visit and len(visited) < max_pages:
+    while to_visit and fetched < max_pages:
         url = to_visit.pop(0)
         if url in visited or is_excluded_url(url):
             continue
@@ -49,57 +61,100 @@ def crawl_wiki(start_url, max_pages):
             print(f"Fetching: {url}")
             res = requests.get(url)
             res.raise_for_status()
-            soup = BeautifulSoup(res.text, "html.parser")
             visited.add(url)
+            fetched += 1
+
+            # Redirects land on a page we may already have
+            final_url = canonicalize_url(res.url)
+            if final_url != url:
+                if final_url in visited:
+                    skipped.add(url)
+                    continue
+                visited.add(final_url)
 
+            soup = BeautifulSoup(res.text, "html.parser")
             for tag in soup(["script", "style", "header", "footer", "nav", "aside"]):
                 tag.extract()
             text = soup.get_text(separator="\n")
             clean = "\n".join([line.strip() for line in text.splitlines() if line.strip()])
-            pages.append({"url": url, "text": clean})
+
+            if page_filter.add(clean):
+                pages.append({"url": final_url, "text": clean})
+                stats.pages_kept += 1
+
+                # --- Checkpoint: save every N pages ---
+                if len(pages) % CHECKPOINT_INTERVAL == 0:
+                    save_vectorstore_checkpoint(pages, checkpoint_suffix=f"checkpoint_{len(pages)}")
+                    print(f"Checkpoint saved after {len(pages)} pages")
+            else:
+                print(f"Skipping near-duplicate page: {final_url}")
+                stats.pages_dropped += 1
 
             # Queue internal links
             for a in soup.find_all("a", href=True):
-                full = urljoin(url, a["href"])
-                if any(full.startswith(domain) for domain in DOMAIN_WHITELIST):
-                    if full not in visited and not is_excluded_url(full):
-                        to_visit.append(full)
-
-            # --- Checkpoint: save every N pages ---
-            if len(pages) % CHECKPOINT_INTERVAL == 0:
-                save_vectorstore_checkpoint(pages, checkpoint_suffix=f"checkpoint_{len(pages)}")
-                print(f"Checkpoint saved after {len(pages)} pages")
+                full = urljoin(res.url, a["href"])
+                if not any(full.startswith(domain) for domain in DOMAIN_WHITELIST):
+                    continue
+                canonical = canonicalize_url(full)
+                if is_noise_url(full) or (canonical != full and (canonical in queued or canonical in visited)):
+                    skipped.add(full)
+                    continue
+                if canonical not in visited and canonical not in queued and not is_excluded_url(canonical):
+                    queued.add(canonical)
+                    to_visit.append(canonical)
         except Exception as e:
             print(f"Error fetching {url}: {e}")
 
+    stats.urls_skipped += len(skipped)
     return pages
 
-def save_vectorstore_checkpoint(pages, checkpoint_suffix="latest"):
+def build_partitions(pages, stats=None):
     texts = [p["text"] for p in pages]
-    metadatas = [{"source": p["url"]} for p in pages]
+    metadatas = [{"source": p["url"], "type": page_type(p["url"])} for p in pages]
 
     splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
     docs = splitter.create_documents(texts, metadatas=metadatas)
+    # Boilerplate repeated across pages would otherwise be embedded many times
+    docs = drop_duplicate_chunks(docs, stats)
 
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vectorstore = FAISS.from_documents(docs, embeddings)
+    # One FAISS index per partition (wiki / fasteners)
+    return build_partitioned(docs, get_embeddings())
+
+def save_vectorstore_checkpoint(pages, checkpoint_suffix="latest"):
+    vectorstores = build_partitions(pages)
 
     checkpoint_path = os.path.join(VECTORSTORE_PATH, checkpoint_suffix)
     os.makedirs(checkpoint_path, exist_ok=True)
-    vectorstore.save_local(checkpoint_path)
+    save_partitioned(vectorstores, checkpoint_path)
 
 def build_vectorstore():
-    wiki_pages = crawl_wiki(BASE_URL_WIKI, max_pages=2000) #2000
-    github_pages = crawl_wiki(BASE_URL_GITHUB, max_pages=450) #450
+    stats = DedupStats()
+    wiki_pages = crawl_wiki(BASE_URL_WIKI, max_pages=2000, stats=stats) #2000
+    github_pages = crawl_wiki(BASE_URL_GITHUB, max_pages=450, stats=stats) #450
     all_pages = wiki_pages + github_pages
 
     if not all_pages:
         print("No pages crawled. Exiting.")
         return
 
-    # Final save
-    save_vectorstore_checkpoint(all_pages, checkpoint_suffix="final")
-    print(f"Vectorstore fully saved to {VECTORSTORE_PATH}/final")
+    vectorstores = build_partitions(all_pages, stats)
+
+    # Keep the partitions rag_extender added to the current version, and its record of ingested files
+    root = index_root()
+    extra = {}
+    if current_version(root):
+        previous, _, manifest = load_version(root, get_embeddings())
+        for name, vectorstore in previous.items():
+            if name not in CRAWLED_PARTITIONS:
+                print(f"Keeping '{name}' partition of version {manifest['version']}")
+                vectorstores[name] = vectorstore
+        if "ingested_files" in manifest:
+            extra["ingested_files"] = manifest["ingested_files"]
+
+    # Final save, published as a new version that running services pick up
+    manifest = publish(vectorstores, root, extra=extra)
+    print(f"Vectorstore version {manifest['version']} published to {root} ({manifest['doc_count']} chunks)")
+    print(stats.summary())
 
 if __name__ == "__main__":
     build_vectorstore()
@@ -1,93 +1,162 @@
 # Code for adding to the index
 
 import os
-import pickle
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from langchain_community.vectorstores import FAISS
 from langchain_community.docstore.document import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
+from src.embeddings import get_embeddings
+from src.rag_partitions import has_partitions, load_partitioned, partition_for, split_vectorstore
+from src.index_versions import current_version, index_root, load_version, publish
+from src.code_chunker import chunk_file
 
 # Directories
 fcmacro_dir = r"C:\Users\yasin\Desktop\Code\CADomatic files\Query2CAD\results\code"
-faiss_index_dir = r"C:\Users\yasin\Desktop\Code\CADomatic files\vectorstore_for_oss120b\correct_vector"  # Existing FAISS index dir
-faiss_save_dir = r"C:\Users\yasin\Desktop\Code\CADomatic files\vectorstore_for_oss120b\final_langchain\index_added_sketch"  # New save dir
-
-# Ensure save directory exists
-os.makedirs(faiss_save_dir, exist_ok=True)
-
-# Initialize HuggingFace embeddings
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-# Load .fcmacro files and tag as "sketch example"
-def load_fcmacro_files(folder_path):
-    docs = []
+faiss_index_dir = r"C:\Users\yasin\Desktop\Code\CADomatic files\vectorstore_for_oss120b\correct_vector"  # Unversioned FAISS index used when the index root has no version yet
+# New versions are published to the shared index root (INDEX_DIR, see src/index_versions.py)
+
+MACRO_EXTENSIONS = (".fcmacro", ".py")
+MACRO_METADATA = {"type": "sketch example"}
+INGEST_WORKERS = min(61, os.cpu_count() or 1)  # Processes reading and parsing macro files; Windows allows at most 61
+POOL_MIN_FILES = 16  # Fewer files than this are read in this process, without starting a pool
+# Embeddings are created inside the functions, not at import time: worker
+# processes re-import this module when they are spawned
+
+# Find .fcmacro / .py files
+def find_macro_files(folder_path):
+    paths = []
     for root, _, files in os.walk(folder_path):
         for file in files:
-            if file.endswith(".FCMacro"):
-                file_path = os.path.join(root, file)
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                docs.append(Document(
-                    page_content=content,
-                    metadata={"source": file_path, "type": "sketch example"}
-                ))
-    return docs
-
-# Load existing FAISS index from directory
-def load_existing_index():
+            if file.lower().endswith(MACRO_EXTENSIONS):
+                paths.append(os.path.join(root, file))
+    return paths
+
+# Read and chunk macro files in parallel and tag them as "sketch example"
+def load_fcmacro_files(folder_path, ingested=None):
+    """
+    Returns (docs per changed file, file records, files skipped, files unchanged).
+    Files whose mtime and size match their record in `ingested` are skipped
+    without being read; files that are read but whose content hash matches
+    are counted as unchanged and only get a new record.
+    """
+    ingested = ingested or {}
+    records = {}
+    to_read = []
+    skipped = 0
+    for path in find_macro_files(folder_path):
+        stat = os.stat(path)
+        previous = ingested.get(path)
+        if previous and previous["mtime"] == stat.st_mtime and previous["size"] == stat.st_size:
+            skipped += 1
+            continue
+        records[path] = {"mtime": stat.st_mtime, "size": stat.st_size}
+        to_read.append(path)
+
+    if len(to_read) < POOL_MIN_FILES:
+        results = list(map(chunk_file, to_read))
+    else:
+        with ProcessPoolExecutor(max_workers=INGEST_WORKERS) as executor:
+            results = list(executor.map(chunk_file, to_read, chunksize=8))
+
+    docs = {}
+    unchanged = 0
+    for path, sha256, chunks in results:
+        records[path]["sha256"] = sha256
+        if ingested.get(path, {}).get("sha256") == sha256:
+            # Touched but not modified
+            records[path]["ids"] = ingested[path].get("ids", [])
+            unchanged += 1
+            continue
+        docs[path] = [
+            Document(page_content=text, metadata={"source": path, **MACRO_METADATA, **extra})
+            for text, extra in chunks
+        ]
+    return docs, records, skipped, unchanged
+
+# Load existing FAISS index as partitions, plus the record of already ingested files
+def load_existing_index(embeddings, root):
+    # Extend the current version of the shared root, which also holds rag_builder's partitions
+    if current_version(root):
+        print(f"✅ Loading current index version {current_version(root)} from {root}...")
+        vectorstores, _, manifest = load_version(root, embeddings)
+        return vectorstores, manifest.get("ingested_files", {})
+
+    if has_partitions(faiss_index_dir):
+        print(f"✅ Loading existing partitioned FAISS index from {faiss_index_dir}...")
+        return load_partitioned(faiss_index_dir, embeddings), {}
+
     index_name = "index_oss120b"  # Your FAISS index file without extension
     index_file = os.path.join(faiss_index_dir, f"{index_name}.faiss")
     if os.path.exists(index_file):
-        print(f"✅ Loading existing FAISS index from {index_file}...")
-        return FAISS.load_local(faiss_index_dir, embeddings, index_name=index_name, allow_dangerous_deserialization=True)
+        print(f"✅ Loading existing FAISS index from {index_file} and splitting it into partitions...")
+        vectorstore = FAISS.load_local(faiss_index_dir, embeddings, index_name=index_name, allow_dangerous_deserialization=True)
+        return split_vectorstore(vectorstore, embeddings), {}
     else:
         print(f"⚠ No existing FAISS index found at {index_file}.")
-        return None
-
-# Split documents into chunks
-def split_documents(docs):
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=100
-    )
-    return text_splitter.split_documents(docs)
+        return {}, {}
 
 # Extend FAISS index with new documents
 def extend_faiss_index():
-    # Load existing index or create a new one
-    vectorstore = load_existing_index()
+    # An unreachable folder would otherwise look like every ingested file was deleted
+    if not os.path.isdir(fcmacro_dir):
+        raise FileNotFoundError(f"Macro folder not found: {fcmacro_dir}")
+    embeddings = get_embeddings()
+    root = index_root()
+    # Load existing partitions; new chunks only touch the macros partition
+    vectorstores, ingested = load_existing_index(embeddings, root)
+    partition = partition_for(MACRO_METADATA)
 
     # Load new documents
     print("🔍 Loading new .fcmacro files...")
-    new_docs = load_fcmacro_files(fcmacro_dir)
-
-    if not new_docs:
+    start = time.perf_counter()
+    new_docs, records, skipped, unchanged = load_fcmacro_files(fcmacro_dir, ingested)
+    elapsed = time.perf_counter() - start
+    print(f"📈 Read {len(records)} files in {elapsed:.2f}s ({len(records) / max(elapsed, 1e-9):.1f} files/sec): "
+          f"{len(new_docs)} re-chunked, {unchanged} with unchanged content; "
+          f"{skipped} skipped without reading (same mtime and size).")
+
+    # Files deleted since the last run lose their chunks and their record
+    removed = [path for path in ingested if not os.path.exists(path)]
+    if not new_docs and not removed and not records:
         print("⚠ No new documents found.")
         return
 
-    print(f"✅ Found {len(new_docs)} new documents.")
-    chunks = split_documents(new_docs)
-    print(f"✅ Split into {len(chunks)} chunks.")
-
-    if vectorstore:
-        print("➕ Adding new chunks to existing FAISS index...")
-        vectorstore.add_documents(chunks)
-    else:
-        print("🆕 Creating new FAISS index...")
-        vectorstore = FAISS.from_documents(chunks, embeddings)
-
-    # Save updated FAISS index in the new directory
-    print(f"💾 Saving updated FAISS index to {faiss_save_dir}...")
-    vectorstore.save_local(faiss_save_dir)
-
-    # Save an additional pickle as a backup
-    pickle_path = os.path.join(faiss_save_dir, "vectorstore_added_sketch.pkl")
-    with open(pickle_path, "wb") as f:
-        pickle.dump(vectorstore, f)
+    # Drop the chunks of modified and deleted files before adding the new versions
+    stale_ids = [doc_id for path in [*new_docs, *removed] for doc_id in ingested.get(path, {}).get("ids", [])]
+    if stale_ids and partition in vectorstores:
+        print(f"➖ Removing {len(stale_ids)} outdated chunks of {len(removed)} deleted and {len(new_docs)} new or modified files...")
+        vectorstores[partition].delete(stale_ids)
+
+    ids = {path: [str(uuid.uuid4()) for _ in docs] for path, docs in new_docs.items()}
+    chunks = [doc for docs in new_docs.values() for doc in docs]
+    if chunks:
+        for doc in chunks:
+            doc.metadata["partition"] = partition
+        print(f"✅ Found {len(new_docs)} new or modified files, split into {len(chunks)} chunks.")
+        all_ids = [doc_id for path in new_docs for doc_id in ids[path]]
+        if partition in vectorstores:
+            print(f"➕ Adding {len(chunks)} chunks to existing '{partition}' partition...")
+            vectorstores[partition].add_documents(chunks, ids=all_ids)
+        else:
+            print(f"🆕 Creating new '{partition}' partition...")
+            vectorstores[partition] = FAISS.from_documents(chunks, embeddings, ids=all_ids)
+
+    # Remember what was ingested so the next run only reads changed files;
+    # files that were only touched are published too, so their new mtime is kept
+    ingested = {path: record for path, record in ingested.items() if path not in removed}
+    for path, record in records.items():
+        if path in ids:
+            record["ids"] = ids[path]
+        ingested[path] = record
+
+    # Publish the updated partitions as a new version; earlier versions remain as backups
+    print(f"💾 Publishing updated FAISS index to {root}...")
+    manifest = publish(vectorstores, root, extra={"ingested_files": ingested})
 
     print(f"✅ Index updated successfully.")
-    print(f"   ➤ FAISS files: {os.path.join(faiss_save_dir, 'index.faiss')} & index.pkl")
-    print(f"   ➤ Backup pickle: {pickle_path}")
+    print(f"   ➤ Version: {manifest['version']} ({manifest['doc_count']} chunks)")
+    print(f"   ➤ Manifest: {os.path.join(root, 'versions', manifest['version'], 'manifest.json')}")
 
 if __name__ == "__main__":
     extend_faiss_index()
@@ -0,0 +1,209 @@
+# Vectorstore partitioned by document type / source domain.
+#
+# Each partition is its own FAISS index saved in a subdirectory of the
+# vectorstore directory, so a query only scans the partitions relevant to it
+# and every partition contributes a fixed quota of chunks to the context.
+
+import os
+import re
+from langchain_community.vectorstores import FAISS
+from src.lexical_index import BM25Index, reciprocal_rank_fusion
+
+INDEX_NAME = "index"
+FETCH_MULTIPLIER = 3  # Dense and lexical candidates fetched per slot of the k quota before fusion
+
+# k: chunks retrieved from the partition per query
+# keywords: the partition is only searched when the query mentions one of
+#           these (None = always searched)
+PARTITIONS = {
+    "wiki": {
+        "k": 8,
+        "keywords": None,
+    },
+    "fasteners": {
+        "k": 3,
+        "keywords": ("fastener", "screw", "bolt", "nut", "washer", "thread", "rivet", "pin", "insert"),
+    },
+    "macros": {
+        "k": 4,
+        "keywords": None,
+    },
+}
+
+FASTENERS_SOURCE = "github.com/shaise"
+
+
+def partition_for(metadata):
+    """Name of the partition a document belongs to, based on its metadata."""
+    if metadata.get("type") == "sketch example":
+        return "macros"
+    if FASTENERS_SOURCE in metadata.get("source", ""):
+        return "fasteners"
+    return "wiki"
+
+
+def group_by_partition(docs):
+    """Group documents by partition, tagging each with its partition name."""
+    groups = {name: [] for name in PARTITIONS}
+    for doc in docs:
+        name = partition_for(doc.metadata)
+        doc.metadata["partition"] = name
+        groups[name].append(doc)
+    return groups
+
+
+def save_partitioned(vectorstores, path):
+    """Save each partition's vectorstore and BM25 index to path/<partition>."""
+    for name, vectorstore in vectorstores.items():
+        partition_path = os.path.join(path, name)
+        os.makedirs(partition_path, exist_ok=True)
+        vectorstore.save_local(partition_path, index_name=INDEX_NAME)
+        BM25Index.from_vectorstore(vectorstore).save(partition_path)
+
+
+def build_partitioned(docs, embeddings):
+    """Embed documents into one FAISS vectorstore per non-empty partition."""
+    return {
+        name: FAISS.from_documents(group, embeddings)
+        for name, group in group_by_partition(docs).items()
+        if group
+    }
+
+
+def has_partitions(path):
+    return any(
+        os.path.exists(os.path.join(path, name, f"{INDEX_NAME}.faiss"))
+        for name in PARTITIONS
+    )
+
+
+def load_partitioned(path, embeddings):
+    """Load every partition saved under path."""
+    vectorstores = {}
+    for name in PARTITIONS:
+        partition_path = os.path.join(path, name)
+        if os.path.exists(os.path.join(partition_path, f"{INDEX_NAME}.faiss")):
+            vectorstores[name] = FAISS.load_local(
+                partition_path,
+                embeddings=embeddings,
+                allow_dangerous_deserialization=True,
+                index_name=INDEX_NAME
+            )
+    return vectorstores
+
+
+def load_lexical_indexes(path):
+    """Load the BM25 index saved next to each partition under path."""
+    indexes = {}
+    for name in PARTITIONS:
+        index = BM25Index.load(os.path.join(path, name))
+        if index is not None:
+            indexes[name] = index
+    return indexes
+
+
+def split_vectorstore(vectorstore, embeddings):
+    """
+    Split a single, unpartitioned FAISS vectorstore into partitions.
+    The stored vectors are reused, so nothing is re-embedded.
+    """
+    grouped = {}
+    for position, docstore_id in vectorstore.index_to_docstore_id.items():
+        doc = vectorstore.docstore.search(docstore_id)
+        name = partition_for(doc.metadata)
+        metadata = {**doc.metadata, "partition": name}
+        vector = vectorstore.index.reconstruct(position)
+        grouped.setdefault(name, []).append((doc.page_content, vector, metadata))
+
+    vectorstores = {}
+    for name, entries in grouped.items():
+        vectorstores[name] = FAISS.from_embeddings(
+            [(text, vector) for text, vector, _ in entries],
+            embeddings,
+            metadatas=[metadata for _, _, metadata in entries]
+        )
+    return vectorstores
+
+
+def select_partitions(query, available):
+    """Partitions worth searching for this query."""
+    words = re.findall(r"[a-z]+", query.lower())
+    selected = []
+    for name in available:
+        keywords = PARTITIONS[name]["keywords"]
+        # Prefix match so plurals and inflections ("bolts", "threaded") count
+        if keywords is None or any(word.startswith(keyword) for word in words for keyword in keywords):
+            selected.append(name)
+    return selected
+
+
+def assign_doc_ids(vectorstore):
+    """
+    Set each stored document's id to its docstore id. Indexes pickled by
+    older LangChain versions store documents without one.
+    """
+    for docstore_id in vectorstore.index_to_docstore_id.values():
+        doc = vectorstore.docstore.search(docstore_id)
+        if doc.id is None:
+            doc.id = docstore_id
+
+
+def dense_search(vectorstore, query_vector, k):
+    """Docstore ids of the k nearest chunks, best first."""
+    results = vectorstore.similarity_search_with_score_by_vector(query_vector, k=k)
+    return [doc.id for doc, _ in results]
+
+
+class PartitionedRetriever:
+    """
+    Retrieve from the relevant partitions only, with a per-partition k quota.
+    Within a partition, dense and BM25 rankings are fused with reciprocal rank
+    fusion unless hybrid is False.
+    """
+
+    def __init__(self, vectorstores, embeddings, quotas=None, lexical_indexes=None, hybrid=True):
+        self.vectorstores = vectorstores
+        self.embeddings = embeddings
+        self.quotas = quotas or {name: config["k"] for name, config in PARTITIONS.items()}
+        self.hybrid = hybrid
+        for vectorstore in vectorstores.values():
+            assign_doc_ids(vectorstore)
+        # Partitions without a saved BM25 index get one built from their docstore
+        self.lexical_indexes = dict(lexical_indexes or {})
+        if hybrid:
+            for name, vectorstore in vectorstores.items():
+                if name not in self.lexical_indexes:
+                    self.lexical_indexes[name] = BM25Index.from_vectorstore(vectorstore)
+
+    def invoke(self, query, partitions=None):
+        """Return the top documents of each selected partition, in partition order."""
+        # Embed the query once and reuse the vector for every partition
+        return self._search(query, lambda: self.embeddings.embed_query(query), partitions)
+
+    def batch(self, queries):
+        """Retrieve for several queries, encoding them in a single embedding batch."""
+        query_vectors = self.embeddings.embed_documents(list(queries))
+        return [
+            self._search(query, lambda vector=vector: vector)
+            for query, vector in zip(queries, query_vectors)
+        ]
+
+    def _search(self, query, get_query_vector, partitions=None):
+        partitions = partitions or select_partitions(query, self.vectorstores)
+        partitions = [name for name in partitions if self.quotas.get(name, 0) > 0]
+        if not partitions:
+            return []
+        query_vector = get_query_vector()
+        docs = []
+        for name in partitions:
+            vectorstore = self.vectorstores[name]
+            k = self.quotas[name]
+            if self.hybrid:
+                fetch_k = k * FETCH_MULTIPLIER
+                dense_ids = dense_search(vectorstore, query_vector, fetch_k)
+                lexical_ids = [doc_id for doc_id, _ in self.lexical_indexes[name].search(query, fetch_k)]
+                doc_ids = reciprocal_rank_fusion([dense_ids, lexical_ids])[:k]
+            else:
+                doc_ids = dense_search(vectorstore, query_vector, k)
+            docs.extend(vectorstore.docstore.search(doc_id) for doc_id in doc_ids)
+        return docs
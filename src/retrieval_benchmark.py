@@ -0,0 +1,106 @@
+# Small labeled benchmark comparing dense-only and hybrid (dense + BM25) retrieval.
+#
+# Each query is labeled with the source pages that answer it; a query is a hit
+# when a retrieved chunk comes from one of them. Half of the queries name the
+# FreeCAD API identifier, the other half paraphrase it, so lexical matching
+# alone cannot score well. Run from the project root:
+#     python -m src.retrieval_benchmark [--index-dir vectorstore/final]
+
+import argparse
+import time
+from src.rag_partitions import PARTITIONS, PartitionedRetriever, load_lexical_indexes, load_partitioned
+
+LABELED_QUERIES = [
+    # Queries naming the identifier
+    {"query": "How do I create a cylinder with makeCylinder?", "sources": ["Part_Cylinder", "Topological_data_scripting"], "paraphrased": False},
+    {"query": "Make a closed wire from points using Part.makePolygon", "sources": ["Part_Polygon", "Topological_data_scripting"], "paraphrased": False},
+    {"query": "Add a coincident Sketcher.Constraint between two lines", "sources": ["Sketcher_ConstrainCoincident", "Sketcher_scripting"], "paraphrased": False},
+    {"query": "Round the edges of a solid with makeFillet", "sources": ["Part_Fillet", "Topological_data_scripting"], "paraphrased": False},
+    {"query": "Create a helix for a thread with makeHelix", "sources": ["Part_Helix", "Topological_data_scripting"], "paraphrased": False},
+    {"query": "Build a loft between two circles with makeLoft", "sources": ["Part_Loft", "Topological_data_scripting"], "paraphrased": False},
+    {"query": "Create a hex bolt with the Fasteners workbench", "sources": ["github.com/shaise"], "paraphrased": False},
+    # Paraphrased queries that do not contain the identifier
+    {"query": "How do I make a round rod of a given radius and length?", "sources": ["Part_Cylinder", "Topological_data_scripting"], "paraphrased": True},
+    {"query": "Create a rectangular block from its length, width and height", "sources": ["Part_Box", "Topological_data_scripting"], "paraphrased": True},
+    {"query": "Spin a 2D profile around an axis to get a solid of revolution", "sources": ["Part_Revolve", "Topological_data_scripting"], "paraphrased": True},
+    {"query": "Push a flat face along a direction to turn it into a solid", "sources": ["Part_Extrude", "Topological_data_scripting"], "paraphrased": True},
+    {"query": "Remove the material of one body from another body", "sources": ["Part_Cut", "Part_Boolean"], "paraphrased": True},
+    {"query": "Merge two overlapping solids into a single shape", "sources": ["Part_Fuse", "Part_Boolean"], "paraphrased": True},
+    {"query": "Move and turn an object to a new position and orientation", "sources": ["Placement"], "paraphrased": True},
+    {"query": "Bevel the sharp corners of a block with a flat cut", "sources": ["Part_Chamfer", "Topological_data_scripting"], "paraphrased": True},
+]
+
+TOTAL_KS = (6, 9, 15)
+
+
+def scaled_quotas(total_k):
+    """Per-partition quotas scaled from the defaults to roughly total_k chunks."""
+    default_total = sum(config["k"] for config in PARTITIONS.values())
+    return {
+        name: max(1, round(config["k"] * total_k / default_total))
+        for name, config in PARTITIONS.items()
+    }
+
+
+def is_relevant(doc, item):
+    """True if the chunk comes from one of the query's expected source pages."""
+    source = doc.metadata.get("source", "").lower()
+    return any(expected.lower() in source for expected in item["sources"])
+
+
+def evaluate(retriever, queries=LABELED_QUERIES):
+    """Hit rate, mean reciprocal rank of the first relevant chunk and mean latency (ms)."""
+    hits = 0
+    reciprocal_ranks = 0.0
+    elapsed = 0.0
+    for item in queries:
+        start = time.perf_counter()
+        docs = retriever.invoke(item["query"])
+        elapsed += time.perf_counter() - start
+        for rank, doc in enumerate(docs, start=1):
+            if is_relevant(doc, item):
+                hits += 1
+                reciprocal_ranks += 1.0 / rank
+                break
+    n = len(queries)
+    return {
+        "hit_rate": hits / n,
+        "mrr": reciprocal_ranks / n,
+        "latency_ms": 1000 * elapsed / n,
+    }
+
+
+def run_benchmark(vectorstores, embeddings, lexical_indexes=None):
+    query_sets = {
+        "all": LABELED_QUERIES,
+        "named": [item for item in LABELED_QUERIES if not item["paraphrased"]],
+        "paraphrased": [item for item in LABELED_QUERIES if item["paraphrased"]],
+    }
+    print(f"{'mode':<8}{'k':>4}{'queries':>13}{'hit rate':>10}{'MRR':>8}{'ms/query':>10}")
+    for total_k in TOTAL_KS:
+        quotas = scaled_quotas(total_k)
+        for hybrid in (False, True):
+            retriever = PartitionedRetriever(
+                vectorstores, embeddings, quotas=quotas, lexical_indexes=lexical_indexes, hybrid=hybrid
+            )
+            mode = "hybrid" if hybrid else "dense"
+            for name, queries in query_sets.items():
+                result = evaluate(retriever, queries)
+                print(f"{mode:<8}{sum(quotas.values()):>4}{name:>13}{result['hit_rate']:>10.2f}"
+                      f"{result['mrr']:>8.2f}{result['latency_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dense vs hybrid retrieval.")
+    parser.add_argument("--index-dir", help="Local partitioned index (default: the serving index)")
+    args = parser.parse_args()
+
+    if args.index_dir:
+        from src.embeddings import get_embeddings
+        embeddings = get_embeddings()
+        vectorstores = load_partitioned(args.index_dir, embeddings)
+        lexical_indexes = load_lexical_indexes(args.index_dir)
+    else:
+        from src.llm_client import embedding as embeddings, retriever
+        vectorstores, lexical_indexes = retriever.vectorstores, retriever.lexical_indexes
+    run_benchmark(vectorstores, embeddings, lexical_indexes)
@@ -5,31 +5,65 @@ from pathlib import Path
 freecad_exe = r"C:\Program Files\FreeCAD 1.0\bin\freecad.exe"
 freecadcmd_exe = r"C:\Program Files\FreeCAD 1.0\bin\freecadcmd.exe"
 script_path = Path("generated/result_script.py")
+log_file = Path("generated/last_run_log.txt")
+
+# Solids of the generated document are exported here after the script runs
+export_script_path = Path("generated/export_shapes.py")
+brep_path = Path("generated/result.brep")
+step_path = Path("generated/result.step")
+
+# Runs as a second file in the same freecadcmd session, so it still executes
+# when the generated script stops on a (harmless) FreeCADGui error
+EXPORT_SNIPPET = """
+import FreeCAD
+import Part
+doc = FreeCAD.ActiveDocument
+if doc is not None:
+    try:
+        shapes = [obj.Shape for obj in doc.Objects
+                  if hasattr(obj, "Shape") and not obj.Shape.isNull() and not obj.InList]
+        if shapes:
+            compound = Part.makeCompound(shapes)
+            compound.exportBrep(r"{brep}")
+            compound.exportStep(r"{step}")
+    except Exception as e:
+        print(f"Export failed: {{e}}")
+"""
+
 
-if not script_path.exists():
-    raise FileNotFoundError("Generated script not found. Run main.py first.")
+def run_script():
+    """Run the generated script headless, export its solids and save the log. Returns the exit code."""
+    if not script_path.exists():
+        raise FileNotFoundError("Generated script not found. Run main.py first.")
 
-# Capture stdout and stderr
-process = subprocess.run(
-    [freecadcmd_exe, str(script_path)],
-    capture_output=True,
-    text=True
-)
+    # Never leave exports from a previous script behind
+    for path in (brep_path, step_path):
+        path.unlink(missing_ok=True)
+    export_script_path.write_text(
+        EXPORT_SNIPPET.format(brep=brep_path.resolve(), step=step_path.resolve())
+    )
 
-# Combine STDOUT and STDERR for full context
-full_output = f"""
+    # Capture stdout and stderr
+    process = subprocess.run(
+        [freecadcmd_exe, str(script_path), str(export_script_path)],
+        capture_output=True,
+        text=True
+    )
+
+    # Combine STDOUT and STDERR for full context
+    full_output = f"""
 {process.stderr}
 """
 
-# Save logs for feedback
-log_file = Path("generated/last_run_log.txt")
-log_file.write_text(full_output)
+    # Save logs for feedback
+    log_file.write_text(full_output)
 
-# Print result
-if process.returncode != 0:
-    print("❌ FreeCAD execution failed. Check log at generated/last_run_log.txt")
-else:
-    print("✅ FreeCAD executed successfully.")
+    # Print result
+    if process.returncode != 0:
+        print("❌ FreeCAD execution failed. Check log at generated/last_run_log.txt")
+    else:
+        print("✅ FreeCAD executed successfully.")
+    return process.returncode
 
 
 def open_freecad():
@@ -38,3 +72,7 @@ def open_freecad():
 
     subprocess.Popen([freecad_exe, str(script_path)])
     print("Opened the part in FreeCAD GUI. Enjoy :)")
+
+
+if __name__ == "__main__":
+    run_script()
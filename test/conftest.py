@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+@pytest.fixture
+def make_part():
+    """Factory for a grayscale image: white background with a dark rectangular part."""
+    def make(box=(32, 32, 96, 96), size=128):
+        image = np.full((size, size), 255, dtype=np.uint8)
+        top, left, bottom, right = box
+        image[top:bottom, left:right] = 40
+        return image
+    return make
+
+
+VOCABULARY = ["cylinder", "box", "bolt", "sketch", "fillet", "thread"]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings over a tiny vocabulary."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(words.count(word)) + 0.01 for word in VOCABULARY]
+
+
+@pytest.fixture
+def embeddings():
+    return KeywordEmbeddings()
+
+
+@pytest.fixture
+def make_docs():
+    """Factory for one small document per partition (two for the wiki), fresh on every call."""
+    def make():
+        return [
+            Document(page_content="makeCylinder cylinder", metadata={"source": "https://wiki.freecad.org/Part_Cylinder"}),
+            Document(page_content="makeBox box", metadata={"source": "https://wiki.freecad.org/Part_Box"}),
+            Document(page_content="hex bolt thread", metadata={"source": "https://github.com/shaise/FreeCAD_FastenersWB"}),
+            Document(page_content="sketch cylinder macro", metadata={"source": "a.FCMacro", "type": "sketch example"}),
+        ]
+    return make
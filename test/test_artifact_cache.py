@@ -0,0 +1,65 @@
+from src import artifact_cache
+
+
+class TestArtifactCache:
+    def setup_method(self):
+        self.script = "import Part\n\n# make a box\nbox = Part.makeBox(10, 10, 10)   \n"
+
+    def test_key_ignores_comments_and_whitespace(self):
+        reformatted = "import Part\r\nbox = Part.makeBox(10, 10, 10)\r\n\r\n"
+        assert artifact_cache.script_key(self.script, "1.0.1") == artifact_cache.script_key(reformatted, "1.0.1")
+
+    def test_key_depends_on_code_and_version(self):
+        other = self.script.replace("10, 10, 10", "10, 10, 20")
+        assert artifact_cache.script_key(self.script, "1.0.1") != artifact_cache.script_key(other, "1.0.1")
+        assert artifact_cache.script_key(self.script, "1.0.1") != artifact_cache.script_key(self.script, "1.0.2")
+
+    def test_store_and_lookup(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(artifact_cache, "CACHE_DIR", tmp_path / "cache")
+        monkeypatch.setattr(artifact_cache, "freecad_version", lambda: "1.0.1")
+        step_file = tmp_path / "result.step"
+        step_file.write_text("ISO-10303-21;")
+
+        key = artifact_cache.script_key(self.script)
+        assert artifact_cache.lookup(key) is None
+
+        artifact_cache.store(key, True, "log text", artifacts={"step": step_file, "brep": tmp_path / "missing.brep"})
+        entry = artifact_cache.lookup(key)
+
+        assert entry["success"] is True
+        assert entry["log"] == "log text"
+        assert set(entry["artifacts"]) == {"step"}
+        assert artifact_cache.artifact_for_script(self.script, "step") == entry["artifacts"]["step"]
+
+    def test_stale_artifacts_are_skipped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(artifact_cache, "CACHE_DIR", tmp_path / "cache")
+        monkeypatch.setattr(artifact_cache, "freecad_version", lambda: "1.0.1")
+        step_file = tmp_path / "result.step"
+        step_file.write_text("ISO-10303-21;")
+
+        entry = artifact_cache.store("key", True, "", artifacts={"step": step_file}, since=step_file.stat().st_mtime + 10)
+        assert entry["artifacts"] == {}
+
+    def test_unknown_version_is_not_served(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(artifact_cache, "CACHE_DIR", tmp_path / "cache")
+        monkeypatch.setattr(artifact_cache, "freecad_version", lambda: artifact_cache.UNKNOWN_VERSION)
+        step_file = tmp_path / "result.step"
+        step_file.write_text("ISO-10303-21;")
+
+        artifact_cache.store(artifact_cache.script_key(self.script), True, "", artifacts={"step": step_file})
+        assert not artifact_cache.enabled()
+        assert artifact_cache.artifact_for_script(self.script, "step") is None
+
+    def test_add_preview_after_store(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(artifact_cache, "CACHE_DIR", tmp_path / "cache")
+        monkeypatch.setattr(artifact_cache, "freecad_version", lambda: "1.0.1")
+        screenshot = tmp_path / "screenshot.png"
+        screenshot.write_bytes(b"png")
+
+        key = artifact_cache.script_key(self.script)
+        assert artifact_cache.add_artifact(key, "preview", screenshot) is None
+
+        artifact_cache.store(key, True, "")
+        entry = artifact_cache.add_artifact(key, "preview", screenshot)
+        assert set(entry["artifacts"]) == {"preview"}
+        assert artifact_cache.artifact_for_script(self.script, "preview") == entry["artifacts"]["preview"]
@@ -0,0 +1,68 @@
+from src.code_chunker import MAX_CHUNK_CHARS, chunk_file, chunk_source
+
+MACRO = '''import FreeCAD as App
+import Part
+from FreeCAD import Vector
+
+# Parameters
+length = 50
+width = 20
+
+
+def make_plate(length, width, thickness):
+    """Base plate."""
+    return Part.makeBox(length, width, thickness)
+
+
+class Holes:
+    def __init__(self, radius):
+        self.radius = radius
+
+# Build the part
+doc = App.newDocument("Plate")
+plate = make_plate(length, width, 5)
+Part.show(plate)
+'''
+
+
+class TestCodeChunker:
+    def test_chunks_follow_definitions(self):
+        chunks = chunk_source(MACRO)
+        symbols = [metadata["symbol"] for _, metadata in chunks]
+        assert symbols == ["module", "make_plate", "Holes", "module"]
+
+        function_text = dict((m["symbol"], t) for t, m in chunks)["make_plate"]
+        assert "def make_plate" in function_text
+        assert "return Part.makeBox" in function_text
+        assert "class Holes" not in function_text
+
+    def test_imports_are_attached_to_every_chunk(self):
+        for text, _ in chunk_source(MACRO):
+            assert text.startswith("import FreeCAD as App\nimport Part\nfrom FreeCAD import Vector\n")
+
+    def test_leading_comments_stay_with_their_block(self):
+        texts = [text for text, _ in chunk_source(MACRO)]
+        assert "# Build the part\ndoc = App.newDocument" in texts[-1]
+        assert "# Parameters\nlength = 50" in texts[0]
+
+    def test_large_definitions_are_split(self):
+        body = "".join(f"    x{i} = Part.makeBox({i}, {i}, {i})\n" for i in range(200))
+        chunks = chunk_source("import Part\n\ndef big():\n" + body)
+        assert len(chunks) > 1
+        assert all(metadata["symbol"] == "big" for _, metadata in chunks)
+        assert all(len(text) <= MAX_CHUNK_CHARS + len("import Part\n\n") for text, _ in chunks)
+
+    def test_syntax_errors_fall_back_to_text_splitting(self):
+        chunks = chunk_source("import Part\ndef broken(:\n    pass\n")
+        assert chunks and chunks[0][1]["symbol"] == "unparsed"
+
+    def test_chunk_file_hashes_content(self, tmp_path):
+        path = tmp_path / "plate.FCMacro"
+        path.write_text(MACRO)
+        first = chunk_file(str(path))
+        path.write_text(MACRO + "\n")
+        second = chunk_file(str(path))
+
+        assert first[0] == str(path)
+        assert first[1] != second[1]
+        assert len(first[2]) == 4
@@ -0,0 +1,48 @@
+from langchain_core.documents import Document
+from src.dedup import (
+    DedupStats,
+    MinHashIndex,
+    SimHashIndex,
+    canonicalize_url,
+    drop_duplicate_chunks,
+    is_noise_url,
+)
+
+PAGE = " ".join(f"Part workbench tool number {i} creates a primitive solid shape." for i in range(200))
+
+
+class TestDedup:
+    def test_canonicalize_url(self):
+        assert canonicalize_url("https://wiki.freecad.org/Part_Box#Scripting") == "https://wiki.freecad.org/Part_Box"
+        assert canonicalize_url("https://Wiki.FreeCAD.org/index.php?title=Part_Box&oldid=12") == "https://wiki.freecad.org/Part_Box"
+        # Namespaced titles canonicalize like the wiki's own /Category:Part links
+        assert canonicalize_url("https://wiki.freecad.org/index.php?title=Category:Part") == "https://wiki.freecad.org/Category:Part"
+        assert canonicalize_url("https://wiki.freecad.org/index.php?title=Macro_Fillet_Arc_(v2)") == "https://wiki.freecad.org/Macro_Fillet_Arc_(v2)"
+        assert canonicalize_url("https://github.com/shaise/FreeCAD_FastenersWB/?tab=readme") == "https://github.com/shaise/FreeCAD_FastenersWB"
+
+    def test_is_noise_url(self):
+        assert is_noise_url("https://wiki.freecad.org/index.php?title=Part_Box&action=history")
+        assert is_noise_url("https://wiki.freecad.org/index.php?title=Part_Box&oldid=1234")
+        assert not is_noise_url("https://wiki.freecad.org/Part_Box")
+
+    def test_simhash_drops_near_duplicate_pages(self):
+        index = SimHashIndex()
+        assert index.add(PAGE)
+        assert not index.add(PAGE + " Retrieved from wiki.")
+        assert index.add("Sketcher constraints fix the geometry of a sketch. " * 20)
+
+    def test_minhash_drops_near_duplicate_chunks(self):
+        index = MinHashIndex()
+        assert index.add(PAGE)
+        assert not index.add(PAGE.replace("number 3 ", "number three "))
+        assert index.add("import Part\nbox = Part.makeBox(10, 10, 10)\nPart.show(box)")
+
+    def test_drop_duplicate_chunks_reports(self):
+        docs = [Document(page_content=text) for text in (PAGE, PAGE, "A different chunk about fillets and chamfers.")]
+        stats = DedupStats()
+
+        kept = drop_duplicate_chunks(docs, stats)
+
+        assert [doc.page_content for doc in kept] == [PAGE, docs[2].page_content]
+        assert (stats.chunks_kept, stats.chunks_dropped) == (2, 1)
+        assert "1 of 3 chunks dropped" in stats.summary()
@@ -0,0 +1,47 @@
+import pytest
+from langchain_core.embeddings import Embeddings
+from src.embeddings import compare_backends, get_embeddings
+from src.rag_partitions import PartitionedRetriever, build_partitioned
+
+
+class TransformedEmbeddings(Embeddings):
+    """Reference embeddings with a fixed transform applied, standing in for another backend."""
+
+    def __init__(self, reference, transform):
+        self.reference = reference
+        self.transform = transform
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.transform(self.reference.embed_query(text))
+
+
+class TestEmbeddings:
+    @pytest.fixture(autouse=True)
+    def setup(self, embeddings, make_docs):
+        self.reference = embeddings
+        self.vectorstores = build_partitioned(make_docs(), self.reference)
+        self.queries = ["a cylinder", "a box", "a bolt thread", "sketch fillet"]
+
+    def make_retriever(self, embeddings):
+        return PartitionedRetriever(self.vectorstores, embeddings, hybrid=False)
+
+    def test_close_backend_is_within_tolerance(self):
+        # A small, fixed perturbation, like a quantized model
+        noisy = TransformedEmbeddings(self.reference, lambda vector: [value + 0.001 * i for i, value in enumerate(vector)])
+        result = compare_backends(self.make_retriever, self.queries, self.reference, noisy)
+
+        assert result["query_cosine"] > 0.99
+        assert result["result_overlap"] == 1.0
+        assert result["within_tolerance"]
+
+    def test_unrelated_backend_is_outside_tolerance(self):
+        reversed_embeddings = TransformedEmbeddings(self.reference, lambda vector: vector[::-1])
+        result = compare_backends(self.make_retriever, self.queries, self.reference, reversed_embeddings)
+        assert not result["within_tolerance"]
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            get_embeddings("tensorrt")
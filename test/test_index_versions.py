@@ -0,0 +1,74 @@
+import json
+import os
+import pytest
+from src import index_versions
+from src.rag_partitions import build_partitioned
+
+
+class TestIndexVersions:
+    @pytest.fixture(autouse=True)
+    def setup(self, embeddings, make_docs):
+        self.embeddings = embeddings
+        self.make_docs = make_docs
+        self.vectorstores = build_partitioned(make_docs(), self.embeddings)
+
+    def test_publish_and_load(self, tmp_path):
+        root = str(tmp_path)
+        assert index_versions.current_version(root) is None
+
+        manifest = index_versions.publish(self.vectorstores, root)
+        assert index_versions.current_version(root) == manifest["version"]
+        assert manifest["doc_count"] == 4
+        assert manifest["partitions"] == {"wiki": 2, "fasteners": 1, "macros": 1}
+        assert manifest["embedding_model"] == index_versions.EMBEDDING_MODEL
+
+        vectorstores, lexical_indexes, loaded_manifest = index_versions.load_version(root, self.embeddings)
+        assert loaded_manifest == manifest
+        assert sorted(vectorstores) == sorted(lexical_indexes) == ["fasteners", "macros", "wiki"]
+
+    def test_corpus_hash_ignores_order(self):
+        reversed_stores = build_partitioned(self.make_docs()[::-1], self.embeddings)
+        assert index_versions.corpus_hash(reversed_stores) == index_versions.corpus_hash(self.vectorstores)
+
+    def test_old_versions_are_pruned(self, tmp_path):
+        root = str(tmp_path)
+        versions_dir = os.path.join(root, index_versions.VERSIONS_DIR)
+        for name in ("20250101-000000-aaaaaaaa", "20250102-000000-bbbbbbbb", "20250103-000000-cccccccc"):
+            os.makedirs(os.path.join(versions_dir, name))
+
+        manifest = index_versions.publish(self.vectorstores, root)
+
+        remaining = sorted(os.listdir(versions_dir))
+        assert len(remaining) == index_versions.KEEP_VERSIONS
+        assert remaining[-1] == manifest["version"]
+        assert "20250101-000000-aaaaaaaa" not in remaining
+
+    def test_embedding_model_mismatch(self, tmp_path):
+        root = str(tmp_path)
+        version = index_versions.publish(self.vectorstores, root)["version"]
+        manifest_path = os.path.join(root, index_versions.VERSIONS_DIR, version, index_versions.MANIFEST_FILE)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest["embedding_model"] = "another-model"
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+        with pytest.raises(ValueError):
+            index_versions.load_version(root, self.embeddings)
+
+    def test_index_root(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(index_versions.load_env, "INDEX_DIR", None)
+        assert index_versions.index_root() == index_versions.DEFAULT_ROOT
+
+        monkeypatch.setattr(index_versions.load_env, "INDEX_DIR", str(tmp_path))
+        version = index_versions.publish(self.vectorstores, index_versions.index_root())["version"]
+        assert index_versions.has_version(str(tmp_path), version)
+        assert not index_versions.has_version(str(tmp_path), "20250101-000000-aaaaaaaa")
+
+    def test_republish_keeps_new_manifest(self, tmp_path):
+        root = str(tmp_path)
+        first = index_versions.publish(self.vectorstores, root, extra={"run": 1})
+        second = index_versions.publish(self.vectorstores, root, extra={"run": 2})
+
+        assert second["version"] != first["version"]
+        assert index_versions.read_manifest(root, index_versions.current_version(root))["run"] == 2
@@ -0,0 +1,38 @@
+from src.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+class TestLexicalIndex:
+    def setup_method(self):
+        self.index = BM25Index.from_texts(
+            ["cyl", "poly", "sketch"],
+            [
+                "cyl = Part.makeCylinder(5, 10) creates a cylinder",
+                "wire = Part.makePolygon([v1, v2, v3, v1])",
+                "sketch.addConstraint(Sketcher.Constraint('Coincident', 0, 2, 1, 1))",
+            ]
+        )
+
+    def test_tokenize_keeps_identifiers(self):
+        tokens = tokenize("Part.makePolygon(points)")
+        assert "part.makepolygon" in tokens
+        assert "makepolygon" in tokens
+        assert "make" in tokens and "polygon" in tokens
+        assert "points" in tokens
+
+    def test_exact_identifier_ranks_first(self):
+        assert self.index.search("use makePolygon", 3)[0][0] == "poly"
+        assert self.index.search("Sketcher.Constraint coincident", 3)[0][0] == "sketch"
+
+    def test_unknown_terms_return_nothing(self):
+        assert self.index.search("spline", 3) == []
+
+    def test_save_and_load(self, tmp_path):
+        self.index.save(str(tmp_path))
+        loaded = BM25Index.load(str(tmp_path))
+        assert loaded.search("makeCylinder", 1) == self.index.search("makeCylinder", 1)
+        assert BM25Index.load(str(tmp_path / "missing")) is None
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]])
+        assert fused[0] == "b"
+        assert set(fused) == {"a", "b", "c"}
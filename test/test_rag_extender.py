@@ -0,0 +1,79 @@
+import os
+import pytest
+from src import rag_extender
+from src.index_versions import current_version, load_version
+from src.load_environment import load_env
+
+ONE_FUNCTION = "import Part\n\n\ndef make_box():\n    return Part.makeBox(1, 1, 1)\n"
+TWO_FUNCTIONS = ONE_FUNCTION + "\n\ndef make_cylinder():\n    return Part.makeCylinder(1, 2)\n"
+
+
+class TestRagExtender:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch, embeddings):
+        self.embeddings = embeddings
+        self.macro_dir = tmp_path / "macros"
+        self.root = str(tmp_path / "index")
+        self.macro_dir.mkdir()
+        monkeypatch.setattr(rag_extender, "fcmacro_dir", str(self.macro_dir))
+        monkeypatch.setattr(rag_extender, "faiss_index_dir", str(tmp_path / "no_legacy_index"))
+        monkeypatch.setattr(load_env, "INDEX_DIR", self.root)
+        monkeypatch.setattr(rag_extender, "get_embeddings", lambda: embeddings)
+
+    def write(self, name, text, mtime):
+        path = self.macro_dir / name
+        path.write_text(text)
+        os.utime(path, (mtime, mtime))
+        return str(path)
+
+    def run(self):
+        rag_extender.extend_faiss_index()
+        vectorstores, _, manifest = load_version(self.root, self.embeddings)
+        return vectorstores["macros"], manifest
+
+    # 0 reads every file through the process pool, 16 reads them in this process
+    @pytest.mark.parametrize("pool_min_files", [0, 16])
+    def test_incremental_ingestion(self, capsys, monkeypatch, pool_min_files):
+        monkeypatch.setattr(rag_extender, "POOL_MIN_FILES", pool_min_files)
+        box = self.write("box.FCMacro", ONE_FUNCTION, 1_000_000)
+        parts = self.write("parts.py", TWO_FUNCTIONS, 1_000_000)
+
+        # Initial run: every file is chunked
+        store, manifest = self.run()
+        assert store.index.ntotal == 3
+        assert sorted(manifest["ingested_files"]) == sorted([box, parts])
+        assert len(manifest["ingested_files"][parts]["ids"]) == 2
+        initial = manifest
+
+        # No change: nothing is read and no version is published
+        capsys.readouterr()
+        rag_extender.extend_faiss_index()
+        assert "2 skipped without reading" in capsys.readouterr().out
+        assert current_version(self.root) == initial["version"]
+
+        # Touch: the file is read, its chunks are kept and its new mtime is recorded
+        os.utime(box, (2_000_000, 2_000_000))
+        store, manifest = self.run()
+        assert "1 with unchanged content" in capsys.readouterr().out
+        assert store.index.ntotal == 3
+        assert manifest["ingested_files"][box]["mtime"] == 2_000_000
+        assert manifest["ingested_files"][box]["ids"] == initial["ingested_files"][box]["ids"]
+
+        # Modify: the old chunks of the file are replaced
+        self.write("box.FCMacro", TWO_FUNCTIONS, 3_000_000)
+        store, manifest = self.run()
+        assert "1 re-chunked" in capsys.readouterr().out
+        assert store.index.ntotal == 4
+        box_ids = manifest["ingested_files"][box]["ids"]
+        assert len(box_ids) == 2
+        assert not set(box_ids) & set(initial["ingested_files"][box]["ids"])
+        assert set(store.index_to_docstore_id.values()) == {
+            doc_id for record in manifest["ingested_files"].values() for doc_id in record["ids"]
+        }
+
+        # Delete: the file's chunks and record are dropped
+        os.remove(parts)
+        store, manifest = self.run()
+        assert store.index.ntotal == 2
+        assert list(manifest["ingested_files"]) == [box]
+        assert set(store.index_to_docstore_id.values()) == set(box_ids)
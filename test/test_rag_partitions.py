@@ -0,0 +1,70 @@
+import pytest
+from langchain_community.vectorstores import FAISS
+from src.rag_partitions import (
+    PartitionedRetriever,
+    build_partitioned,
+    dense_search,
+    load_partitioned,
+    partition_for,
+    save_partitioned,
+    select_partitions,
+    split_vectorstore,
+)
+
+
+class TestRagPartitions:
+    @pytest.fixture(autouse=True)
+    def setup(self, embeddings, make_docs):
+        self.embeddings = embeddings
+        self.make_docs = make_docs
+
+    def test_partition_for(self):
+        assert [partition_for(doc.metadata) for doc in self.make_docs()] == ["wiki", "wiki", "fasteners", "macros"]
+
+    def test_select_partitions(self):
+        available = ["wiki", "fasteners", "macros"]
+        assert select_partitions("Create a flange", available) == ["wiki", "macros"]
+        assert select_partitions("Make M8 bolts", available) == available
+
+    def test_retriever_respects_quotas_and_filters(self):
+        vectorstores = build_partitioned(self.make_docs(), self.embeddings)
+        retriever = PartitionedRetriever(vectorstores, self.embeddings, quotas={"wiki": 1, "fasteners": 1, "macros": 1})
+
+        docs = retriever.invoke("a cylinder")
+        assert [doc.metadata["partition"] for doc in docs] == ["wiki", "macros"]
+        assert docs[0].page_content == "makeCylinder cylinder"
+
+        docs = retriever.invoke("a bolt with a thread")
+        assert [doc.metadata["partition"] for doc in docs] == ["wiki", "fasteners", "macros"]
+
+    def test_split_vectorstore_reuses_vectors(self):
+        vectorstore = FAISS.from_documents(self.make_docs(), self.embeddings)
+        vectorstores = split_vectorstore(vectorstore, self.embeddings)
+
+        assert {name: store.index.ntotal for name, store in vectorstores.items()} == {"wiki": 2, "fasteners": 1, "macros": 1}
+
+    def test_save_and_load(self, tmp_path):
+        save_partitioned(build_partitioned(self.make_docs(), self.embeddings), str(tmp_path))
+        loaded = load_partitioned(str(tmp_path), self.embeddings)
+
+        assert sorted(loaded) == ["fasteners", "macros", "wiki"]
+        assert loaded["wiki"].index.ntotal == 2
+
+    def test_batch_matches_invoke(self):
+        vectorstores = build_partitioned(self.make_docs(), self.embeddings)
+        retriever = PartitionedRetriever(vectorstores, self.embeddings)
+        queries = ["a cylinder", "a bolt with a thread"]
+
+        assert retriever.batch(queries) == [retriever.invoke(query) for query in queries]
+
+    def test_dense_search_on_documents_without_ids(self):
+        vectorstore = FAISS.from_documents(self.make_docs(), self.embeddings)
+        # Documents pickled by older LangChain versions carry no id
+        for docstore_id in vectorstore.index_to_docstore_id.values():
+            vectorstore.docstore.search(docstore_id).id = None
+
+        retriever = PartitionedRetriever({"wiki": vectorstore}, self.embeddings, quotas={"wiki": 1})
+        doc_ids = dense_search(vectorstore, self.embeddings.embed_query("box"), 2)
+
+        assert vectorstore.docstore.search(doc_ids[0]).page_content == "makeBox box"
+        assert retriever.invoke("box")[0].page_content == "makeBox box"
@@ -0,0 +1,40 @@
+import pytest
+from src.image_compare.similarity import (
+    score_batch,
+    similarity_score,
+    needs_vlm,
+    silhouette_iou,
+    load_batch,
+)
+
+
+class TestSimilarity:
+    @pytest.fixture(autouse=True)
+    def setup(self, make_part):
+        self.part = make_part()
+        self.shifted = make_part(box=(40, 40, 104, 104))
+        self.other = make_part(box=(10, 60, 118, 70))
+
+    def test_identical_images_score_one(self):
+        assert similarity_score(self.part, self.part) > 0.99
+
+    def test_score_batch_shapes(self):
+        scores = score_batch([self.part, self.shifted, self.other], [self.part, self.other])
+        for name in ("iou", "phash", "ssim", "combined"):
+            assert scores[name].shape == (3, 2)
+
+    def test_matching_reference_ranks_highest(self):
+        scores = score_batch([self.part, self.other], [self.part, self.other])["combined"]
+        assert scores[0, 0] > scores[0, 1]
+        assert scores[1, 1] > scores[1, 0]
+
+    def test_silhouette_iou_of_shifted_part(self):
+        batch = load_batch([self.part, self.shifted])
+        iou = silhouette_iou(batch[:1], batch[1:])[0, 0]
+        # 56x56 overlap of two 64x64 squares
+        expected = 56 * 56 / (2 * 64 * 64 - 56 * 56)
+        assert abs(iou - expected) < 0.05
+
+    def test_needs_vlm(self):
+        assert not needs_vlm(self.part, [self.other, self.part])
+        assert needs_vlm(self.part, [self.other])
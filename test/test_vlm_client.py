@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+from langchain_core.messages import AIMessage
+from src.image_compare import vlm_client
+
+
+class TestVLMClient:
+    @pytest.fixture(autouse=True)
+    def setup(self, make_part):
+        vlm_client._responses.clear()
+        vlm_client._encoded_images.clear()
+        self.reference = make_part((8, 8, 56, 56), size=64)
+        self.candidate = make_part((2, 28, 62, 36), size=64)
+
+    def test_similar_render_skips_vlm(self):
+        with patch('src.image_compare.vlm_client.get_llm') as mock_get_llm:
+            result = vlm_client.compare(self.reference, self.reference, "a plate")
+
+            assert result is None
+            mock_get_llm.assert_not_called()
+
+    def test_identical_comparisons_are_cached(self):
+        mock_llm = Mock()
+        mock_llm.batch.side_effect = lambda messages, config: [AIMessage(content="Widen the part")] * len(messages)
+
+        with patch('src.image_compare.vlm_client.get_llm', return_value=mock_llm):
+            first = vlm_client.compare(self.candidate, self.reference, "a plate")
+            second = vlm_client.compare(self.candidate.copy(), self.reference, "a plate")
+
+        assert first == second == "Widen the part"
+        assert mock_llm.batch.call_count == 1
+
+    def test_batch_deduplicates_candidates(self):
+        mock_llm = Mock()
+        mock_llm.batch.side_effect = lambda messages, config: [AIMessage(content="Fix it")] * len(messages)
+
+        with patch('src.image_compare.vlm_client.get_llm', return_value=mock_llm):
+            results = vlm_client.compare_batch(
+                [self.candidate, self.reference, self.candidate.copy()], self.reference, "a plate"
+            )
+
+        assert results == ["Fix it", None, "Fix it"]
+        sent = mock_llm.batch.call_args[0][0]
+        assert len(sent) == 1
+
+    def test_images_are_downsampled(self):
+        large = np.zeros((2000, 1000, 3), dtype=np.uint8)
+        data_url = vlm_client.encode_image(large)
+        decoded = vlm_client.Image.open(
+            vlm_client.io.BytesIO(vlm_client.base64.b64decode(data_url.split(",", 1)[1]))
+        )
+        assert max(decoded.size) == vlm_client.MAX_IMAGE_SIZE